@@ -0,0 +1,71 @@
+# This script does the following:
+#   1. Loads the waste classifier
+#   2. Classifies frames from the camera (or random frames if no camera is
+#      given) and times every stage: capture, preprocess, invoke and
+#      postprocess
+#   3. Times the old per-frame path of final_rpi.py (tensor details looked up
+#      and a new input tensor allocated for every frame) for comparison
+#   4. Prints mean and 95th percentile latency per stage
+#
+# Usage:
+#     $ python bench_classifier.py [--model MODEL] [--camera INDEX] [--frames N]
+
+import argparse
+import time
+import numpy as np
+import cv2
+from classifier import MODEL_PATH, WasteClassifier
+
+
+def report(name, samples):
+    samples = 1e3 * np.asarray(samples)
+    print(f"{name:>20} {samples.mean():8.2f}ms {np.percentile(samples, 95):8.2f}ms")
+
+
+def legacy_preprocess(interpreter, img):
+    # what final_rpi.py did per frame before WasteClassifier
+    img_tensor = np.asarray(img, dtype=np.float32)
+    img_tensor = img_tensor/255.
+    img_tensor = np.expand_dims(img_tensor, axis=0)
+    input_details = interpreter.get_input_details()
+    interpreter.get_output_details()
+    interpreter.set_tensor(input_details[0]['index'], img_tensor)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--camera", type=int, default=None)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    classifier = WasteClassifier(args.model)
+    height, width, channels = classifier.input_shape
+    cap = cv2.VideoCapture(args.camera) if args.camera is not None else None
+    rng = np.random.default_rng(0)
+
+    stages = {"capture": [], "preprocess": [], "invoke": [],
+              "postprocess": [], "legacy preprocess": []}
+    for _ in range(args.frames):
+        t0 = time.perf_counter()
+        if cap is not None:
+            ret, img = cap.read()
+            img = cv2.resize(img, (width, height))
+        else:
+            img = rng.integers(0, 256, (height, width, channels), dtype=np.uint8)
+        t1 = time.perf_counter()
+        classifier.preprocess(img)
+        t2 = time.perf_counter()
+        classifier.invoke()
+        t3 = time.perf_counter()
+        classifier.postprocess()
+        t4 = time.perf_counter()
+        legacy_preprocess(classifier.interpreter, img)
+        t5 = time.perf_counter()
+
+        for name, t in zip(stages, (t1-t0, t2-t1, t3-t2, t4-t3, t5-t4)):
+            stages[name].append(t)
+
+    print(f"{'stage':>20} {'mean':>10} {'p95':>10}")
+    for name, samples in stages.items():
+        report(name, samples)
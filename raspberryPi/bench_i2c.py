@@ -0,0 +1,152 @@
+# This script does the following:
+#   1. Schedules 'w' and 's' commands from a simulated Arduino (FakeSMBus)
+#      at random times
+#   2. Runs the old main loop of final_rpi.py (two read_byte per iteration,
+#      no pause) and I2CCommandDispatcher with several poll intervals and
+#      with an interrupt line, for the same duration each
+#   3. Prints bus transactions per second, bus utilisation at 100kHz, CPU
+#      time, the latency from a command becoming readable to its handler and
+#      the number of commands handled (the old loop drops every command read
+#      by the readData call checking for the other one)
+#   4. Flushes a list of results byte by byte (write_byte) and in framed
+#      block writes (write_frames) on a bus losing some writes, and prints
+#      transactions and bus time of both
+#
+# Usage:
+#     $ python bench_i2c.py [--duration SECONDS] [--rate COMMANDS_PER_SECOND]
+#                           [--items N] [--error-rate P]
+
+import argparse
+import bisect
+import time
+import numpy as np
+from i2c_protocol import I2CCommandDispatcher, FakeSMBus, encode_frames
+
+# one-byte read at 100kHz: address + data byte with acks and start/stop
+TRANSACTION_TIME = 20 / 100e3
+BIT_TIME = 1 / 100e3
+
+
+class FakeGPIO:
+    """Interrupt line raised while the fake Arduino has a command pending"""
+    BCM, IN, PUD_DOWN, RISING = "BCM", "IN", "PUD_DOWN", "RISING"
+
+    def __init__(self, bus, times):
+        self.bus = bus
+        self.times = times
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None):
+        pass
+
+    def input(self, pin):
+        return self.bus.pending()
+
+    def wait_for_edge(self, pin, edge, timeout):
+        # sleep until the next command like the kernel would
+        now = time.monotonic()
+        i = bisect.bisect_right(self.times, now)
+        until = self.times[i] if i < len(self.times) else now + timeout / 1e3
+        time.sleep(max(min(until - now, timeout / 1e3), 0))
+        return pin if self.bus.pending() else None
+
+
+def run(name, duration, times, commands, make_loop):
+    bus = FakeSMBus(TRANSACTION_TIME)
+    start = time.monotonic()
+    schedule = [start + t for t in times]
+    for at, command in zip(schedule, commands):
+        bus.schedule(at, command)
+    latencies = []
+
+    def handler():
+        # the command was readable since the latest scheduled time before now
+        now = time.monotonic()
+        latencies.append(now - schedule[bisect.bisect_right(schedule, now) - 1])
+
+    cpu = time.process_time()
+    make_loop(bus, schedule, handler, start + duration)
+    cpu = time.process_time() - cpu
+    latencies = 1e3 * np.array(latencies)
+    print(f"{name:>16} {bus.transactions/duration:10.0f} "
+          f"{100*bus.transactions*TRANSACTION_TIME/duration:6.1f}% "
+          f"{100*cpu/duration:6.1f}% "
+          f"{latencies.mean():8.1f}ms {latencies.max():8.1f}ms {len(latencies):4d}")
+
+
+def legacy_loop(bus, schedule, handler, end):
+    # final_rpi.py before I2CCommandDispatcher, with the str/int comparison
+    # fixed so that commands are seen at all
+    while time.monotonic() < end:
+        if chr(bus.read_byte(0x04)) == 'w':
+            handler()
+        if chr(bus.read_byte(0x04)) == 's':
+            handler()
+
+
+def dispatcher_loop(poll_interval, irq=False):
+    def loop(bus, schedule, handler, end):
+        gpio = FakeGPIO(bus, schedule) if irq else None
+        dispatcher = I2CCommandDispatcher(
+            bus, poll_interval=poll_interval, irq_pin=17 if irq else None,
+            gpio=gpio)
+        dispatcher.on('w', handler)
+        dispatcher.on('s', handler)
+        while time.monotonic() < end:
+            dispatcher.poll()
+            dispatcher.wait()
+    return loop
+
+
+def flush(items, error_rate):
+    results = list(np.random.default_rng(1).choice(['p', 'c', 'b'], items))
+
+    # final_rpi.py before write_frames: one write_byte per item, no retry
+    bus = FakeSMBus(error_rate=error_rate, seed=0)
+    lost = 0
+    for r in results:
+        try:
+            bus.write_byte(0x04, ord(r))
+        except OSError:
+            lost += 1
+    # start, address, data byte, acks and stop per transaction
+    bits = bus.transactions * 20
+    print(f"{'write_byte':>16} {bus.transactions:6d} {1e3*bits*BIT_TIME:8.1f}ms "
+          f"{lost:5d}")
+
+    bus = FakeSMBus(error_rate=error_rate, seed=0)
+    dispatcher = I2CCommandDispatcher(bus)
+    transactions = dispatcher.write_frames(results, retry_delay=0)
+    # start, address, register and every frame byte with acks, and stop
+    frame_bits = {len(f): 2 + 9 * (len(f) + 2) for f in encode_frames(results)}
+    bits = sum(frame_bits[len(data)] for register, data in bus.written)
+    bits += (transactions - len(bus.written)) * max(frame_bits.values())
+    print(f"{'write_frames':>16} {transactions:6d} {1e3*bits*BIT_TIME:8.1f}ms "
+          f"{0:5d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=2.0)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, args.duration, int(args.rate*args.duration)))
+    commands = rng.choice(['w', 's'], len(times), p=[0.8, 0.2])
+
+    print(f"{'loop':>16} {'reads/s':>10} {'bus':>7} {'CPU':>7} "
+          f"{'latency':>10} {'max':>10} {'cmds':>4}")
+    run("legacy", args.duration, times, commands, legacy_loop)
+    for interval in (0.01, 0.05, 0.1):
+        run(f"poll {1e3*interval:.0f}ms", args.duration, times, commands,
+            dispatcher_loop(interval))
+    run("irq", args.duration, times, commands, dispatcher_loop(0.5, irq=True))
+
+    print()
+    print(f"{'flush':>16} {'writes':>6} {'bus time':>10} {'lost':>5}")
+    flush(args.items, args.error_rate)
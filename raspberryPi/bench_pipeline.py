@@ -0,0 +1,56 @@
+# This script does the following:
+#   1. Simulates the stages of the sorter (capture, preprocess, inference,
+#      actuation) with fixed durations, sleeping like the real stages block
+#      in OpenCV, TFLite and I2C calls with the GIL released
+#   2. Runs a batch of items through them one after another, as final_rpi.py
+#      did, and through a Pipeline
+#   3. Prints items per second of both and the statistics of every stage
+#
+# Usage:
+#     $ python bench_pipeline.py [--items N] [--capture S] [--preprocess S]
+#                                [--inference S] [--actuation S]
+
+import argparse
+import time
+from pipeline import Pipeline
+
+
+def stage(seconds):
+    def run(item):
+        time.sleep(seconds)
+        return item
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--capture", type=float, default=0.15)
+    parser.add_argument("--preprocess", type=float, default=0.02)
+    parser.add_argument("--inference", type=float, default=0.25)
+    parser.add_argument("--actuation", type=float, default=0.05)
+    args = parser.parse_args()
+
+    stages = [(name, stage(getattr(args, name)))
+              for name in ("capture", "preprocess", "inference", "actuation")]
+
+    t0 = time.perf_counter()
+    for item in range(args.items):
+        for name, func in stages:
+            item = func(item)
+    sequential = time.perf_counter() - t0
+
+    with Pipeline(stages) as pipeline:
+        t0 = time.perf_counter()
+        for item in range(args.items):
+            pipeline.put(item)
+        pipeline.join()
+        pipelined = time.perf_counter() - t0
+
+    print(f"sequential {args.items/sequential:6.2f} items/s")
+    print(f"pipelined  {args.items/pipelined:6.2f} items/s")
+    print()
+    print(f"{'stage':>10} {'items':>6} {'items/s':>8} {'busy':>7} {'idle':>7} {'blocked':>7}")
+    for name, stats in pipeline.stats.items():
+        print(f"{name:>10} {stats.items:6d} {stats.throughput:8.2f} "
+              f"{stats.busy:6.2f}s {stats.idle:6.2f}s {stats.blocked:6.2f}s")
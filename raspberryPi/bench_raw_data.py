@@ -0,0 +1,44 @@
+# This script does the following:
+#   1. Fills a ctypes double buffer the way ltr11_get_raw_data does
+#   2. Converts it to numpy with the old per-sample list comprehension
+#   3. Converts it to numpy with the zero-copy view used by get_raw_data
+#   4. Converts it to numpy with a single copy (get_raw_data(copy=True))
+#   5. Prints the time per call for each method
+#
+# No radar device is needed; only the conversion from the library buffer to
+# numpy is measured.
+
+from ctypes import POINTER, c_double, cast
+import timeit
+import numpy as np
+
+
+def list_comprehension(data, nsamples):
+    return np.array([data[i] for i in range(2*nsamples)])
+
+
+def view(data, nsamples):
+    return np.ctypeslib.as_array(data, shape=(2*nsamples,))
+
+
+def single_copy(data, nsamples):
+    return np.ctypeslib.as_array(data, shape=(2*nsamples,)).copy()
+
+
+if __name__ == "__main__":
+    methods = [("list comprehension", list_comprehension),
+               ("view", view),
+               ("copy", single_copy)]
+
+    print(f"{'samples':>8} {'method':>20} {'time/call':>12}")
+    for nsamples in (256, 1024, 2048, 4096):
+        buf = (c_double * (2*nsamples))(*np.random.rand(2*nsamples))
+        data = cast(buf, POINTER(c_double))
+
+        expected = list_comprehension(data, nsamples)
+        for name, method in methods:
+            assert np.array_equal(method(data, nsamples), expected)
+
+            number, total = timeit.Timer(
+                lambda: method(data, nsamples)).autorange()
+            print(f"{nsamples:>8} {name:>20} {1e6*total/number:>10.2f}us")
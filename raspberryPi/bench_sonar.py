@@ -0,0 +1,101 @@
+# This script does the following:
+#   1. Simulates three HC-SR04 sensors at known distances with fake_gpio
+#   2. Measures them with the busy-waiting distance() of unltrasonic.py and
+#      with the edge callbacks of sonar.Sonar
+#   3. Prints CPU time per reading, mean error and standard deviation of
+#      both, and the number of missed echoes, also for sensors dropping some
+#      echoes. The busy-waiting loop hangs forever on a missed edge; here it
+#      gives up after 100ms so that the benchmark finishes.
+#   4. Times a scan of all sensors one after another and with
+#      SonarScheduler, with and without dropped echoes (each costs a whole
+#      timeout)
+#
+# Usage:
+#     $ python bench_sonar.py [--readings N] [--drop-rate P] [--scans N]
+
+import argparse
+import time
+import numpy as np
+from fake_gpio import FakeGPIO, FakeSensor
+from sonar import Sonar, SonarScheduler
+
+TRIGGERS = [18, 19, 20]
+ECHOS = [24, 25, 26]
+DISTANCES = [8.0, 40.0, 80.0]
+
+
+def busy_wait_distance(gpio, ind, guard=0.1):
+    # distance() of unltrasonic.py before Sonar, with a guard time after
+    # which a missed edge counts as missed echo instead of hanging forever
+    gpio.output(TRIGGERS[ind], True)
+    time.sleep(0.00001)
+    gpio.output(TRIGGERS[ind], False)
+
+    StartTime = time.time()
+    StopTime = time.time()
+    deadline = StartTime + guard
+    while gpio.input(ECHOS[ind]) == 0:
+        StartTime = time.time()
+        if StartTime > deadline:
+            return float("nan")
+    while gpio.input(ECHOS[ind]) == 1:
+        StopTime = time.time()
+        if StopTime > deadline:
+            return float("nan")
+    return (StopTime - StartTime) * 34300 / 2
+
+
+def make_gpio(drop_rate=0.0):
+    return FakeGPIO({t: FakeSensor(e, d, drop_rate=drop_rate)
+                     for t, e, d in zip(TRIGGERS, ECHOS, DISTANCES)}, seed=0)
+
+
+def run(name, measure, readings):
+    errors = []
+    missed = 0
+    cpu = time.process_time()
+    for k in range(readings):
+        ind = k % len(DISTANCES)
+        distance = measure(ind)
+        if np.isnan(distance):
+            missed += 1
+        else:
+            errors.append(distance - DISTANCES[ind])
+        # let the sensor settle, as between measurements on the device
+        time.sleep(0.01)
+    cpu = time.process_time() - cpu
+    errors = np.array(errors)
+    print(f"{name:>12} {1e3*cpu/readings:8.2f}ms {errors.mean():+8.2f}cm "
+          f"{errors.std():7.2f}cm {missed:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", type=int, default=150)
+    parser.add_argument("--drop-rate", type=float, default=0.05)
+    parser.add_argument("--scans", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'method':>12} {'CPU':>10} {'error':>10} {'std':>9} {'missed':>6}")
+    gpio = make_gpio()
+    run("busy-wait", lambda ind: busy_wait_distance(gpio, ind), args.readings)
+
+    sonar = Sonar(TRIGGERS, ECHOS, gpio=make_gpio())
+    run("sonar", lambda ind: sonar.measure(ind).distance, args.readings)
+
+    sonar = Sonar(TRIGGERS, ECHOS, gpio=make_gpio(args.drop_rate))
+    run("sonar drops", lambda ind: sonar.measure(ind).distance, args.readings)
+
+    print()
+    print(f"{'scan':>12} {'drop rate':>10} {'time':>10}")
+    for drop_rate in (0.0, args.drop_rate):
+        sonar = Sonar(TRIGGERS, ECHOS, gpio=make_gpio(drop_rate))
+        for name, scan in [
+                ("sequential", lambda: [sonar.measure(i) for i in range(len(ECHOS))]),
+                ("scheduler", SonarScheduler(sonar).scan)]:
+            t0 = time.perf_counter()
+            for _ in range(args.scans):
+                scan()
+                time.sleep(0.01)
+            seconds = (time.perf_counter() - t0) / args.scans - 0.01
+            print(f"{name:>12} {drop_rate:10.2f} {1e3*seconds:8.2f}ms")
@@ -0,0 +1,74 @@
+# This script does the following:
+#   1. Imports the inference path of final_rpi.py in a fresh Python process,
+#      once with the old TensorFlow/Keras preprocessing import and once with
+#      the numpy/OpenCV preprocess module
+#   2. Measures import time and peak resident memory of each process
+#   3. Checks that preprocess.to_input matches img_to_array(img) / 255.
+#      bit for bit if TensorFlow is installed
+#
+# Usage:
+#     $ python bench_startup.py [--runs N]
+
+import argparse
+import subprocess
+import sys
+import numpy as np
+
+IMPORTS = {
+    "tensorflow": "import numpy, cv2, tflite_runtime.interpreter\n"
+                  "from tensorflow.keras.preprocessing import image\n",
+    "preprocess": "import numpy, cv2, tflite_runtime.interpreter\n"
+                  "import preprocess\n",
+}
+
+MEASURE = """
+import time, resource
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+print(t1 - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure(imports):
+    """Return (import time in s, peak RSS in MiB) of a fresh interpreter."""
+    result = subprocess.run([sys.executable, "-c", MEASURE.format(imports=imports)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    seconds, maxrss = result.stdout.split()
+    return float(seconds), int(maxrss) / 1024
+
+
+def check_equivalence():
+    try:
+        from tensorflow.keras.preprocessing import image
+    except ImportError:
+        print("TensorFlow not installed, skipping equivalence check")
+        return
+    import cv2
+    import preprocess
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    expected = image.img_to_array(cv2.resize(img, (224, 224))) / 255.
+    actual = preprocess.to_input(img, (224, 224))
+    assert expected.dtype == actual.dtype and np.array_equal(expected, actual)
+    print("preprocess.to_input matches img_to_array(img) / 255.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'imports':>12} {'time':>10} {'peak RSS':>12}")
+    for name, imports in IMPORTS.items():
+        runs = [measure(imports) for _ in range(args.runs)]
+        if None in runs:
+            print(f"{name:>12} {'import failed':>23}")
+            continue
+        seconds, maxrss = np.median(runs, axis=0)
+        print(f"{name:>12} {1e3*seconds:8.0f}ms {maxrss:8.1f}MiB")
+
+    check_equivalence()
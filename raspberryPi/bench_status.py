@@ -0,0 +1,71 @@
+# This script does the following:
+#   1. Starts a local HTTP server standing in for the dashboard's status API
+#      (GET /api/status/{name}/{field}/{status}), with keep-alive
+#   2. Sends the same status updates with a new connection per request
+#      (requests.get, as send_request.py did) and with StatusClient
+#   3. Prints mean and 95th percentile latency and the number of TCP
+#      connections the server accepted for both
+#
+# Usage:
+#     $ python bench_status.py [--requests N]
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import requests
+from send_request import StatusClient
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately; without this, Nagle's
+    # algorithm and delayed ACKs add 40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StatusHandler.connections += 1
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(name, get, n):
+    StatusHandler.connections = 0
+    latencies = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        get("BIN_0", "CanFull", "true" if i % 2 else "false")
+        latencies.append(time.perf_counter() - t0)
+    latencies = 1e3 * np.array(latencies)
+    print(f"{name:>14} {latencies.mean():8.2f}ms {np.percentile(latencies, 95):8.2f}ms "
+          f"{StatusHandler.connections:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api/status"
+
+    print(f"{'client':>14} {'mean':>10} {'p95':>10} {'conns':>6}")
+    run("requests.get",
+        lambda name, field, status: requests.get(f"{base_url}/{name}/{field}/{status}"),
+        args.requests)
+    with StatusClient(base_url) as client:
+        run("StatusClient", client.update_status, args.requests)
+    server.shutdown()
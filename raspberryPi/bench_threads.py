@@ -0,0 +1,31 @@
+# This script does the following:
+#   1. Loads the waste classifier with every combination of interpreter
+#      threads (1 to the number of cores) and XNNPACK on/off
+#   2. Times the invoke of each setting after warm-up
+#   3. Prints the settings sorted by speed and the fastest one
+#   4. With --save, stores the fastest setting next to the model, where
+#      WasteClassifier picks it up by default
+#
+# Usage:
+#     $ python bench_threads.py [--model MODEL] [--runs N] [--save]
+
+import argparse
+from classifier import MODEL_PATH, save_settings, settings_path, sweep
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    results = sweep(args.model, runs=args.runs)
+    print(f"{'threads':>8} {'xnnpack':>8} {'invoke':>10}")
+    for num_threads, xnnpack, seconds in results:
+        print(f"{num_threads:>8} {str(xnnpack):>8} {1e3*seconds:8.2f}ms")
+
+    num_threads, xnnpack, seconds = results[0]
+    print(f"fastest: WasteClassifier(num_threads={num_threads}, xnnpack={xnnpack})")
+    if args.save:
+        save_settings(num_threads, xnnpack, args.model)
+        print(f"saved to {settings_path(args.model)}")
@@ -0,0 +1,62 @@
+# This script does the following:
+#   1. Opens BGT60LTR11 radar device
+#   2. Sets configuration
+#   3. Fetches blocks of samples, once polling the FIFO every 20ms (the old
+#      behaviour of get_raw_data) and once with the adaptive wait
+#   4. Prints a histogram of how late each block was returned
+#
+# The latency of a block is the time between the moment its last sample was
+# produced and the moment get_raw_data returned it. As the sampling clock of
+# the RadarBaseboardMCU7 is not visible to the host, the production time is
+# extrapolated from the first block; the smallest latency is taken as zero.
+#
+# Pass --sim to run against the simulated device from ltr11_sim instead of a
+# RadarBaseboardMCU7.
+
+from ltr11 import *
+from ltr11_sim import BGT60LTR11Simulator
+import sys
+import time
+import numpy as np
+
+num_blocks = 500
+block_samples = 64
+sampling_frequency = 2000
+
+
+def measure(ltr11, block_samples, num_blocks):
+    ltr11.start_data_acquisition()
+    # drop samples buffered before the measurement
+    ltr11.get_raw_data()
+    returned = np.empty(num_blocks)
+    for i in range(num_blocks):
+        ltr11.get_raw_data(block_samples)
+        returned[i] = time.monotonic()
+    ltr11.stop_data_acquisition()
+
+    produced = returned[0] + np.arange(num_blocks) * block_samples / sampling_frequency
+    latency = returned - produced
+    return latency - latency.min()
+
+
+def print_histogram(latency, bins):
+    # latencies beyond the last bin are counted in the last bin
+    counts, edges = np.histogram(np.clip(latency, 0, bins[-1]), bins)
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        bar = "#" * int(60 * count / len(latency))
+        print(f"  {1e3*low:5.1f}-{1e3*high:5.1f}ms {count:5d} {bar}")
+    print(f"  mean {1e3*latency.mean():.2f}ms, "
+          f"99th percentile {1e3*np.percentile(latency, 99):.2f}ms")
+
+
+if __name__ == "__main__":
+    bins = np.linspace(0, 0.025, 11)
+    backend = BGT60LTR11Simulator() if "--sim" in sys.argv else None
+    with BGT60LTR11(backend=backend) as ltr11:
+        ltr11.set_configuration(sampling_frequency=sampling_frequency)
+
+        for name, poll_interval in (("fixed 20ms poll", 0.02),
+                                    ("adaptive wait", None)):
+            ltr11.poll_interval = poll_interval
+            print(f"{name}: {num_blocks} blocks of {block_samples} samples")
+            print_histogram(measure(ltr11, block_samples, num_blocks), bins)
@@ -0,0 +1,186 @@
+"""
+Background camera capture keeping the newest frame at hand
+
+Overview
+--------
+
+``cv2.VideoCapture.read`` returns the oldest frame in the driver's queue and
+blocks until it is decoded, so reading only when an item arrives gives a
+stale frame and puts the capture latency on the critical path.
+
+``ThreadedCapture`` runs a background thread that keeps decoding into a small
+ring of preallocated frames. Consumers get the newest frame together with its
+timestamp and sequence number without waiting:
+
+    with ThreadedCapture(0) as cap:
+        frame, timestamp, seq = cap.latest()
+        # process frame
+        print(cap.stats)
+
+A frame handed out stays untouched until ``buffers - 1`` newer frames have
+been captured; copy it if it is kept longer than that.
+
+``read``, ``start`` and ``stop`` mirror ``picam_fps.PiVideoStream`` so that
+either can be used by the sorter scripts.
+"""
+
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import cv2
+
+__all__ = ["CaptureStats", "ThreadedCapture"]
+
+
+CaptureStats = namedtuple(
+    "CaptureStats", ["frames", "fps", "dropped", "failures"])
+CaptureStats.__doc__ = '''\
+Statistics of a ``ThreadedCapture``
+
+Members:
+- ``frames``: number of frames captured
+- ``fps``: capture frame rate, averaged over the last frames
+- ``dropped``: number of frames never handed out because a newer one
+  arrived first
+- ``failures``: number of failed reads from the camera'''
+
+
+class ThreadedCapture:
+    """Background reader of a cv2.VideoCapture into a ring of frames."""
+
+    def __init__(self, src=0, resolution=None, framerate=None, buffers=4):
+        """Open a camera and allocate the frame ring.
+
+        Parameters
+        ----------
+        src: int or str
+            Camera index or video source passed to cv2.VideoCapture.
+
+        resolution: tuple
+            Optional capture size (width, height).
+
+        framerate: float
+            Optional capture frame rate.
+
+        buffers: int
+            Number of frames in the ring, at least 2.
+        """
+        self.stream = cv2.VideoCapture(src)
+        if resolution is not None:
+            self.stream.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+            self.stream.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+        if framerate is not None:
+            self.stream.set(cv2.CAP_PROP_FPS, framerate)
+        ok, frame = self.stream.read()
+        if not ok:
+            self.stream.release()
+            raise RuntimeError(f"Could not read from camera {src}")
+
+        self._frames = np.empty((max(buffers, 2),) + frame.shape, frame.dtype)
+        self._timestamps = np.zeros(len(self._frames))
+        self._frames[0] = frame
+        # one view per slot, so that the same frame is always the same object
+        self._slots = list(self._frames)
+        self._timestamps[0] = time.monotonic()
+        # number of frames captured; the newest is at (_seq - 1) % buffers
+        self._seq = 1
+        self._last_read = 0
+        self._new_frame = threading.Condition()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._fps = 0.0
+        self._dropped = 0
+        self._failures = 0
+
+    def start(self):
+        """Start the capture thread; returns self."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="ThreadedCapture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the capture thread and release the camera."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        self.stream.release()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            i = self._seq % len(self._frames)
+            slot = self._slots[i]
+            ok, frame = self.stream.read(slot)
+            if not ok:
+                self._failures += 1
+                self._stopped.wait(0.01)
+                continue
+            if frame is not slot:
+                # OpenCV allocated a new image, e.g. after a resolution change
+                slot[...] = frame
+            now = time.monotonic()
+            with self._new_frame:
+                interval = now - float(self._timestamps[i - 1])
+                if interval > 0:
+                    self._fps = 1 / interval if self._fps == 0 \
+                        else 0.9 * self._fps + 0.1 / interval
+                self._timestamps[i] = now
+                self._seq += 1
+                self._new_frame.notify_all()
+
+    def latest(self):
+        """Return (frame, timestamp, seq) of the newest frame.
+
+        `timestamp` is the time.monotonic() at which the frame was captured,
+        `seq` counts the frames captured so far.
+        """
+        with self._new_frame:
+            seq = self._seq
+            if seq > self._last_read + 1:
+                self._dropped += seq - self._last_read - 1
+            self._last_read = max(self._last_read, seq)
+            i = (seq - 1) % len(self._frames)
+            return self._slots[i], self._timestamps[i], seq
+
+    def wait(self, seq, timeout=None):
+        """Wait for a frame newer than `seq` and return it like ``latest``.
+
+        Returns None if no new frame arrived within `timeout` seconds.
+        """
+        with self._new_frame:
+            if not self._new_frame.wait_for(lambda: self._seq > seq, timeout):
+                return None
+        return self.latest()
+
+    def frames(self, timeout=None):
+        """Yield the newest frame, then every new frame as it is captured.
+
+        Stops if no new frame arrives within `timeout` seconds.
+        """
+        frame, timestamp, seq = self.latest()
+        while True:
+            yield frame
+            result = self.wait(seq, timeout)
+            if result is None:
+                return
+            frame, timestamp, seq = result
+
+    def read(self):
+        """Return the newest frame."""
+        return self.latest()[0]
+
+    @property
+    def stats(self):
+        """Current ``CaptureStats``."""
+        return CaptureStats(self._seq, self._fps, self._dropped,
+                            self._failures)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,105 @@
+"""
+Capture trigger firing as soon as the scene in front of the camera is still.
+
+Replaces the fixed sleep between the Arduino's 'w' signal and the capture:
+frames are downscaled to a small grayscale image and compared with the
+previous one; once the mean absolute difference stays below a threshold for
+a number of consecutive frames, the item has settled and the last frame is
+returned. A short minimum wait keeps the trigger from firing on the empty
+scene before the item has landed, and a timeout bounds the wait if the
+scene never settles.
+
+    trigger = StillnessTrigger(cap.read)
+    img, waited, timed_out = trigger.wait()
+"""
+
+import time
+import numpy as np
+import cv2
+
+__all__ = ["StillnessTrigger"]
+
+
+class StillnessTrigger:
+    """Waits until consecutive camera frames stop changing"""
+
+    def __init__(self, read, threshold=2.0, still_frames=3, min_wait=0.2, timeout=3.0,
+                 size=(64, 48), frame_interval=0.01, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        read: callable
+            Returns the newest camera frame, e.g. PiVideoStream.read.
+
+        threshold: float
+            Mean absolute difference (in gray levels, 0..255) between two
+            downscaled frames below which they count as still.
+
+        still_frames: int
+            Number of consecutive still frame pairs needed to fire.
+
+        min_wait: float
+            Minimum time in s to wait before the trigger may fire.
+
+        timeout: float
+            Maximum time in s to wait; the newest frame is returned when it
+            expires.
+
+        size: tuple
+            (width, height) of the grayscale image frames are compared at.
+
+        frame_interval: float
+            Time in s to sleep between reads, so that the same frame is not
+            compared with itself more often than necessary.
+
+        clock: callable
+            Time source in s.
+        """
+        self.read = read
+        self.threshold = threshold
+        self.still_frames = still_frames
+        self.min_wait = min_wait
+        self.timeout = timeout
+        self.size = size
+        self.frame_interval = frame_interval
+        self.clock = clock
+        self._gray = np.empty(size[::-1], dtype=np.uint8)
+        self._previous = np.empty(size[::-1], dtype=np.uint8)
+        self._diff = np.empty(size[::-1], dtype=np.uint8)
+
+    def _downscale(self, img, out):
+        small = cv2.resize(img, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=out)
+        else:
+            np.copyto(out, small)
+
+    def wait(self):
+        """Wait until the scene is still and return (frame, waited, timed_out).
+
+        `waited` is the time in s spent waiting, `timed_out` is True if the
+        timeout expired before the scene was still.
+        """
+        start = self.clock()
+        img = self.read()
+        self._downscale(img, self._previous)
+        still = 0
+        while True:
+            if self.clock() - start >= self.timeout:
+                return img, self.clock() - start, True
+            time.sleep(self.frame_interval)
+            frame = self.read()
+            if frame is img:
+                # no new frame from the camera yet
+                continue
+            img = frame
+            self._downscale(img, self._gray)
+            cv2.absdiff(self._gray, self._previous, dst=self._diff)
+            if self._diff.mean() < self.threshold:
+                still += 1
+                if (still >= self.still_frames
+                        and self.clock() - start >= self.min_wait):
+                    return img, self.clock() - start, False
+            else:
+                still = 0
+            self._gray, self._previous = self._previous, self._gray
@@ -0,0 +1,314 @@
+"""
+Waste classifier running a TFLite model on camera frames.
+
+The interpreter's tensor indices are resolved once and every frame is
+preprocessed straight into the interpreter's own input buffer, so that
+classifying a frame allocates nothing but the small output copy.
+
+Quantized models (uint8/int8 input or output tensors, e.g. made with
+quantize_model.py) are detected from the tensors' quantization parameters:
+frames are quantized directly into the input tensor and the scores are
+dequantized, so callers see the same float scores either way.
+
+The interpreter is warmed up on construction since the first invoke() is
+much slower than the following ones. `sweep` times the combinations of
+interpreter threads and XNNPACK on this host; ``bench_threads.py --save``
+stores the fastest one next to the model, where the classifier picks it up
+unless `num_threads` or `xnnpack` are given. Without saved settings it runs
+on all cores with XNNPACK.
+
+`classify_burst` averages the scores of several frames of the same item and
+stops as soon as the top class leads by a given margin, so that clear items
+cost one inference and only ambiguous ones pay for the whole burst.
+
+    classifier = WasteClassifier()
+    label, scores = classifier.classify(frame)
+"""
+
+import itertools
+import json
+import os
+import time
+from collections import namedtuple
+import warnings
+import numpy as np
+try:
+    import tflite_runtime.interpreter as tflite
+except ImportError:
+    # full TensorFlow, e.g. when evaluating models on a desktop
+    from tensorflow import lite as tflite
+# tflite_runtime exports these at the top, TensorFlow under experimental;
+# OpResolverType is missing before TFLite 2.7, XNNPACK cannot be disabled then
+_experimental = getattr(tflite, "experimental", tflite)
+OpResolverType = getattr(_experimental, "OpResolverType", None)
+load_delegate = getattr(_experimental, "load_delegate", None)
+import preprocess
+
+__all__ = ["MODEL_PATH", "CLASSES", "BurstResult", "WasteClassifier", "sweep",
+           "settings_path", "load_settings", "save_settings"]
+
+MODEL_PATH = "/home/pi/Documents/waste20220311_nasnet.tflite"
+CLASSES = ['can', 'paperbox', 'PET']
+
+
+BurstResult = namedtuple(
+    "BurstResult",
+    ["label", "scores", "confidence", "margin", "frames", "latency"])
+BurstResult.__doc__ = '''\
+Result of ``WasteClassifier.classify_burst``
+
+Members:
+- ``label``: class with the highest mean score
+- ``scores``: scores averaged over the classified frames
+- ``confidence``: mean score of ``label``
+- ``margin``: difference between the two highest mean scores
+- ``frames``: number of frames classified
+- ``latency``: time in s spent on the burst, including waiting for frames'''
+
+
+class WasteClassifier:
+    """TFLite waste classifier reusing its tensors across inferences"""
+
+    def __init__(self, model_path=MODEL_PATH, classes=CLASSES,
+                 num_threads=None, xnnpack=None, delegate=None, warmup=2):
+        """Load the model and resolve its input and output tensors.
+
+        Parameters
+        ----------
+        model_path: str
+            Path of the .tflite model.
+
+        classes: list
+            Class labels in the order of the model outputs.
+
+        num_threads: int
+            Number of interpreter threads. If None, the number saved by
+            ``bench_threads.py --save`` for this model, else os.cpu_count().
+
+        xnnpack: bool
+            Use the XNNPACK delegate TFLite applies by default. If False,
+            only the builtin kernels are used; ignored with a warning on
+            runtimes that cannot disable it. If None, the setting saved by
+            ``bench_threads.py --save`` for this model, else True.
+
+        delegate: str
+            Optional path of an external delegate library, loaded with
+            load_delegate.
+
+        warmup: int
+            Number of invokes on a blank frame run on construction.
+        """
+        self.classes = list(classes)
+        if num_threads is None or xnnpack is None:
+            saved = load_settings(model_path) or {}
+            if num_threads is None:
+                num_threads = saved.get("num_threads")
+            if xnnpack is None:
+                xnnpack = saved.get("xnnpack", True)
+        self.num_threads = num_threads or os.cpu_count()
+        if not xnnpack and OpResolverType is None:
+            warnings.warn("this TFLite runtime cannot disable XNNPACK")
+            xnnpack = True
+        self.xnnpack = xnnpack
+        kwargs = {}
+        if not xnnpack:
+            kwargs["experimental_op_resolver_type"] = \
+                OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        if delegate is not None:
+            kwargs["experimental_delegates"] = [load_delegate(delegate)]
+        self.interpreter = tflite.Interpreter(
+            model_path=model_path, num_threads=self.num_threads, **kwargs)
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(input_details['shape'][1:])
+        self.input_dtype = input_details['dtype']
+        self.output_dtype = output_details['dtype']
+        # (scale, zero_point), or None for float tensors whose
+        # quantization parameters are (0.0, 0)
+        self.input_quantization = self._quantization(input_details)
+        self.output_quantization = self._quantization(output_details)
+        self._input_index = input_details['index']
+        self._output_index = output_details['index']
+        # tensor() returns functions giving views of the interpreter's
+        # buffers; the views must not be held while invoke() runs
+        self._input = self.interpreter.tensor(self._input_index)
+        self._output = self.interpreter.tensor(self._output_index)
+
+        if warmup:
+            self._input()[...] = 0
+            for _ in range(warmup):
+                self.invoke()
+
+    @property
+    def quantized(self):
+        """True if the model takes a quantized input tensor."""
+        return self.input_quantization is not None
+
+    @staticmethod
+    def _quantization(details):
+        scale, zero_point = details['quantization']
+        if scale == 0 or not np.issubdtype(details['dtype'], np.integer):
+            return None
+        return float(scale), int(zero_point)
+
+    def prepare(self, img, out=None):
+        """Return a frame converted to the model's input, without the batch axis.
+
+        Same conversion as ``preprocess``, but into `out` or a new array
+        instead of the input tensor, so that it can run in another thread
+        than the inference (see ``classify_prepared``).
+        """
+        height, width, channels = self.input_shape
+        img = preprocess.resize(img, (width, height))
+        if img.shape != self.input_shape:
+            raise ValueError(
+                f"frame has shape {img.shape}, model expects {self.input_shape}")
+        return preprocess.to_input(img, out=out, dtype=self.input_dtype,
+                                   quantization=self.input_quantization)
+
+    def preprocess(self, img):
+        """Write a frame into the input tensor.
+
+        Equivalent to ``cv2.resize`` to the model's input size and
+        ``img_to_array(img) / 255.`` followed by ``np.expand_dims`` and
+        ``set_tensor``, without the temporaries. For quantized models the
+        scaled frame is quantized instead, see `preprocess.quantize`.
+        """
+        self.prepare(img, out=self._input()[0])
+
+    def invoke(self):
+        """Run the model on the current input tensor."""
+        self.interpreter.invoke()
+
+    def postprocess(self):
+        """Return (label, scores) of the last inference."""
+        scores = self._output()[0]
+        if self.output_quantization is not None:
+            scale, zero_point = self.output_quantization
+            scores = (scores.astype(np.float32) - zero_point) * np.float32(scale)
+        else:
+            scores = scores.copy()
+        return self.classes[int(np.argmax(scores))], scores
+
+    def classify(self, img):
+        """Classify a frame and return (label, scores)."""
+        self.preprocess(img)
+        self.invoke()
+        return self.postprocess()
+
+    def classify_prepared(self, tensor):
+        """Classify an input from ``prepare`` and return (label, scores)."""
+        self._input()[0] = tensor
+        self.invoke()
+        return self.postprocess()
+
+    def classify_burst(self, frames, max_frames=5, min_margin=0.5,
+                       prepared=False):
+        """Classify several frames of one item and average their scores.
+
+        Parameters
+        ----------
+        frames: iterable
+            Frames of the item, e.g. ``ThreadedCapture.frames()``. Frames
+            are only taken from it as needed.
+
+        max_frames: int
+            Maximum number of frames to classify.
+
+        min_margin: float
+            Stop early once the highest mean score exceeds the second
+            highest by this margin.
+
+        prepared: bool
+            True if `frames` were already converted with ``prepare``.
+
+        Returns
+        -------
+        ``BurstResult``
+        """
+        start = time.perf_counter()
+        total = None
+        count = 0
+        classify = self.classify_prepared if prepared else self.classify
+        for img in frames:
+            label, scores = classify(img)
+            total = scores if total is None else total + scores
+            count += 1
+            second, first = np.partition(total, -2)[-2:] / count
+            if first - second >= min_margin or count >= max_frames:
+                break
+        if count == 0:
+            raise ValueError("No frames to classify")
+        mean = total / count
+        return BurstResult(self.classes[int(np.argmax(mean))], mean,
+                           float(first), float(first - second), count,
+                           time.perf_counter() - start)
+
+
+def sweep(model_path=MODEL_PATH, thread_counts=None, xnnpack=(True, False),
+          runs=20):
+    """Time the interpreter settings on this host.
+
+    Parameters
+    ----------
+    model_path: str
+        Path of the .tflite model.
+
+    thread_counts: list
+        Numbers of threads to try, 1 to os.cpu_count() if None.
+
+    xnnpack: tuple
+        XNNPACK settings to try. Only True is tried on runtimes that cannot
+        disable XNNPACK.
+
+    runs: int
+        Number of timed invokes per setting (after warm-up).
+
+    Returns
+    -------
+    list
+        (num_threads, xnnpack, mean invoke time in s) per setting, fastest
+        first.
+    """
+    if thread_counts is None:
+        thread_counts = range(1, os.cpu_count() + 1)
+    if OpResolverType is None:
+        xnnpack = [x for x in xnnpack if x] or [True]
+    results = []
+    for num_threads, use_xnnpack in itertools.product(thread_counts, xnnpack):
+        classifier = WasteClassifier(model_path, num_threads=num_threads,
+                                     xnnpack=use_xnnpack)
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            classifier.invoke()
+        results.append((num_threads, use_xnnpack,
+                        (time.perf_counter() - t0) / runs))
+    return sorted(results, key=lambda result: result[2])
+
+
+def settings_path(model_path=MODEL_PATH):
+    """Path of the interpreter settings saved for a model."""
+    return os.path.splitext(model_path)[0] + ".settings.json"
+
+
+def load_settings(model_path=MODEL_PATH):
+    """Return the settings saved with ``save_settings``, or None.
+
+    Returns
+    -------
+    dict
+        ``num_threads`` and ``xnnpack``, as passed to ``WasteClassifier``.
+    """
+    try:
+        with open(settings_path(model_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_settings(num_threads, xnnpack, model_path=MODEL_PATH):
+    """Save the interpreter settings ``WasteClassifier`` uses for a model."""
+    with open(settings_path(model_path), "w") as f:
+        json.dump({"num_threads": num_threads, "xnnpack": xnnpack}, f)
@@ -0,0 +1,376 @@
+"""
+Doppler processing for BGT60LTR11AIP
+
+Overview
+--------
+
+``DopplerSpectrogram`` turns a continuous stream of IFI/IFQ blocks into a
+short-time Doppler spectrogram. Every frame is computed like the single
+spectrum in doppler_fft.py: mean removal, Chebyshev window, FFT and
+``10*log10(|fft|)``. Frames overlap by ``num_samples - hop`` samples and are
+kept in a rolling 2D array of the most recent ``num_frames`` frames.
+
+    spectrogram = DopplerSpectrogram(num_samples=512, hop=128)
+    ltr11.start_data_acquisition()
+    while True:
+        ifi, ifq = ltr11.get_data(256)
+        frames = spectrogram.push(ifi, ifq)  # 0, 1 or more new frames
+
+The window, the frequency axis and the fftshift index map come from a
+``DopplerPlan``. ``get_plan`` computes a plan once per combination of
+(num_samples, window_type, attenuation, sampling_frequency) and can persist
+it to a directory; SciPy is only imported when a Chebyshev window has to be
+computed, not when it is loaded from there. A block handed to ``push`` may
+complete any number of frames; all of them are computed in one batch.
+
+The spectra are fftshifted, i.e. ``frequency`` increases monotonically from
+-sampling_frequency/2 to sampling_frequency/2. Approaching targets result in a
+peak at positive frequencies, departing targets at negative frequencies.
+
+``estimate_targets`` finds the dominant target in one spectrum or a batch of
+spectra and returns its Doppler frequency, radial velocity, SNR and
+direction:
+
+    estimate = estimate_targets(frames, spectrogram.frequency)
+    estimate.velocity[estimate.detected]
+"""
+
+from collections import namedtuple
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+__all__ = ["DopplerPlan", "get_plan", "DopplerSpectrogram", "DopplerEstimate",
+           "estimate_targets"]
+
+SPEED_OF_LIGHT = 299792458.0
+
+# directory for persisted plans, used by the scripts in this directory
+DEFAULT_PLAN_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ltr11")
+
+
+def _window(window_type, num_samples, attenuation):
+    if window_type == "chebwin":
+        from scipy.signal.windows import chebwin
+        return chebwin(num_samples, at=attenuation)
+    if window_type == "hann":
+        return np.hanning(num_samples)
+    if window_type == "hamming":
+        return np.hamming(num_samples)
+    if window_type == "blackman":
+        return np.blackman(num_samples)
+    if window_type == "boxcar":
+        return np.ones(num_samples)
+    raise ValueError(f"Unknown window type: {window_type}")
+
+
+class DopplerPlan:
+    """Precomputed window, frequency axis and fftshift index map"""
+
+    def __init__(self, num_samples, window_type="chebwin", attenuation=150,
+                 sampling_frequency=2000, window=None):
+        """Create a plan.
+
+        Use ``get_plan`` to share plans instead of creating them directly.
+
+        Parameters
+        ----------
+        num_samples: int
+            Samples per frame (FFT length).
+
+        window_type: str
+            "chebwin" (Chebyshev), "hann", "hamming", "blackman" or "boxcar".
+
+        attenuation: float
+            Sidelobe attenuation in dB, only used by "chebwin".
+
+        sampling_frequency: float
+            Sampling frequency in Hz.
+
+        window: np.ndarray
+            Precomputed window coefficients; computed if None.
+        """
+        self.key = (num_samples, window_type, attenuation, sampling_frequency)
+        self.num_samples = num_samples
+        self.sampling_frequency = sampling_frequency
+        if window is None:
+            window = _window(window_type, num_samples, attenuation)
+        self.window = window
+        # fftshifted frequency axis and the index map producing it
+        self.shift = np.fft.fftshift(np.arange(num_samples))
+        self.frequency = np.fft.fftfreq(
+            num_samples, 1/sampling_frequency)[self.shift]
+
+
+_plans = {}
+
+
+def get_plan(num_samples, window_type="chebwin", attenuation=150,
+             sampling_frequency=2000, plan_dir=None):
+    """Get the ``DopplerPlan`` for the given parameters.
+
+    Plans are cached for the lifetime of the process. If `plan_dir` is given,
+    the window is also loaded from, or saved to, that directory, so that
+    later processes do not have to compute it (and import SciPy) again.
+    """
+    key = (num_samples, window_type, attenuation, sampling_frequency)
+    plan = _plans.get(key)
+    if plan is not None:
+        return plan
+
+    # only the window is persisted; the frequency axis and the index map
+    # are cheap to compute with numpy
+    window = None
+    path = None
+    if plan_dir is not None:
+        path = os.path.join(
+            plan_dir, "doppler_window_{}_{}_{:g}.npy".format(*key[:3]))
+        try:
+            window = np.load(path)
+        except (OSError, ValueError):
+            window = None
+        if window is not None and window.shape != (num_samples,):
+            window = None
+
+    plan = DopplerPlan(*key, window=window)
+    if path is not None and window is None:
+        os.makedirs(plan_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, plan.window)
+        os.replace(tmp, path)
+
+    _plans[key] = plan
+    return plan
+
+
+DopplerEstimate = namedtuple(
+    "DopplerEstimate",
+    ["detected", "frequency", "velocity", "snr", "direction"])
+DopplerEstimate.__doc__ = '''\
+Dominant target of a Doppler spectrum
+
+Members:
+- ``detected``: bool, True if a peak exceeds the CFAR threshold
+- ``frequency``: interpolated Doppler frequency of the peak in Hz
+- ``velocity``: radial velocity in m/s; positive if approaching
+- ``snr``: peak power over the CFAR noise estimate in dB
+- ``direction``: "approach", "depart" or "none"
+
+For a batch of spectra every member is an array with one element per
+spectrum. If ``detected`` is False, ``frequency``, ``velocity`` and ``snr``
+are NaN and ``direction`` is "none".'''
+
+
+class DopplerSpectrogram:
+    """Streaming short-time Doppler spectrum of IFI/IFQ data"""
+
+    def __init__(self, num_samples=512, hop=128, sampling_frequency=2000,
+                 attenuation=150, num_frames=256, window_type="chebwin",
+                 plan_dir=None):
+        """Create a streaming spectrogram.
+
+        Parameters
+        ----------
+        num_samples: int
+            Samples per frame (FFT length).
+
+        hop: int
+            Samples between the start of two consecutive frames.
+
+        sampling_frequency: float
+            Sampling frequency of the IFI/IFQ data in Hz.
+
+        attenuation: float
+            Sidelobe attenuation of the Chebyshev window in dB.
+
+        num_frames: int
+            Number of most recent frames kept in ``frames``.
+
+        window_type: str
+            Window function, see ``DopplerPlan``.
+
+        plan_dir: str
+            Directory to persist the plan in, see ``get_plan``.
+        """
+        if not 0 < hop <= num_samples:
+            raise ValueError("hop must be between 1 and num_samples")
+
+        self.num_samples = num_samples
+        self.hop = hop
+        self.sampling_frequency = sampling_frequency
+        self.plan = get_plan(num_samples, window_type, attenuation,
+                             sampling_frequency, plan_dir)
+        self.window = self.plan.window
+        self.frequency = self.plan.frequency
+
+        self._frames = np.full((num_frames, num_samples), np.nan)
+        self.frame_count = 0
+        self._pending = np.empty(0, dtype=complex)
+
+    @property
+    def num_frames(self):
+        """Number of frames kept."""
+        return len(self._frames)
+
+    def push(self, ifi, ifq):
+        """Add a block of IFI/IFQ samples.
+
+        Returns
+        -------
+        frames: np.ndarray
+            Array of shape (n, num_samples) with the n frames completed by
+            this block, oldest first. n may be zero.
+        """
+        signal = np.concatenate([self._pending, ifi + 1j*ifq])
+        if len(signal) < self.num_samples:
+            self._pending = signal
+            return np.empty((0, self.num_samples))
+
+        windows = sliding_window_view(signal, self.num_samples)[::self.hop]
+        frames = self.compute(windows)
+
+        self._pending = signal[len(windows)*self.hop:].copy()
+        self._store(frames)
+        return frames
+
+    def compute(self, windows):
+        """Doppler spectra of complex frames of shape (n, num_samples)."""
+        frames = windows - windows.mean(axis=1, keepdims=True)
+        frames *= self.window
+        spectrum = np.abs(np.fft.fft(frames, axis=1))
+        np.maximum(spectrum, np.finfo(float).tiny, out=spectrum)
+        return 10*np.log10(spectrum[:, self.plan.shift])
+
+    def _store(self, frames):
+        # frames older than the rolling array are dropped
+        skip = max(len(frames) - self.num_frames, 0)
+        index = self.frame_count + np.arange(skip, len(frames))
+        self._frames[index % self.num_frames] = frames[skip:]
+        self.frame_count += len(frames)
+
+    def frames(self, num_frames=None):
+        """The most recent frames, oldest first.
+
+        Returns an array of shape (n, num_samples) holding the last
+        `num_frames` frames (all kept frames if None). Frames not computed
+        yet are NaN.
+        """
+        if num_frames is None:
+            num_frames = self.num_frames
+        num_frames = min(num_frames, self.num_frames)
+        rows = (self.frame_count - num_frames + np.arange(num_frames)) \
+            % self.num_frames
+        return self._frames[rows]
+
+    def times(self, num_frames=None):
+        """Start time in seconds of the frames returned by ``frames``."""
+        if num_frames is None:
+            num_frames = self.num_frames
+        num_frames = min(num_frames, self.num_frames)
+        index = self.frame_count - num_frames + np.arange(num_frames)
+        return index * self.hop / self.sampling_frequency
+
+
+def _cfar_noise(power, guard, train):
+    """Cell-averaging CFAR noise estimate along the last axis.
+
+    The spectrum is treated as circular. For every bin the noise is the mean
+    of `train` bins on either side, skipping `guard` bins next to it.
+    """
+    n = power.shape[-1]
+    reach = guard + train
+    padded = np.concatenate(
+        [power[..., n-reach:], power, power[..., :reach]], axis=-1)
+    csum = np.cumsum(padded, axis=-1)
+    csum = np.concatenate(
+        [np.zeros(power.shape[:-1] + (1,)), csum], axis=-1)
+
+    k = np.arange(n) + reach  # position of each bin in padded
+    lower = csum[..., k - guard] - csum[..., k - reach]
+    upper = csum[..., k + reach + 1] - csum[..., k + guard + 1]
+    return (lower + upper) / (2*train)
+
+
+def estimate_targets(spectrum, frequency, rf_frequency=61.1e9, threshold=12.0,
+                     guard=2, train=16, min_frequency=5.0):
+    """Estimate the dominant target in Doppler spectra.
+
+    The noise floor around every bin is estimated with cell-averaging CFAR.
+    Among the bins exceeding it by `threshold`, the strongest is taken as the
+    target and its frequency is refined by parabolic interpolation over the
+    neighbouring bins. All spectra of a batch are processed at once.
+
+    Parameters
+    ----------
+    spectrum: np.ndarray
+        Spectrum of shape (num_samples,) or batch of spectra of shape
+        (num_frames, num_samples), fftshifted and in dB as
+        ``10*log10(|fft|)``, e.g. the frames of ``DopplerSpectrogram``.
+
+    frequency: np.ndarray
+        Frequency of every bin in Hz, fftshifted like `spectrum`.
+
+    rf_frequency: float
+        RF center frequency in Hz used to convert the Doppler frequency into
+        a velocity. The default corresponds to ``rf_center_freq=1`` in
+        non-Japan mode.
+
+    threshold: float
+        Minimum SNR in dB over the CFAR noise estimate.
+
+    guard: int
+        Number of guard bins on either side of the bin under test.
+
+    train: int
+        Number of training bins on either side used for the noise estimate.
+
+    min_frequency: float
+        Bins with an absolute frequency below this value in Hz are ignored;
+        the mean removal leaves the bins around DC unreliable.
+
+    Returns
+    -------
+    estimate: ``DopplerEstimate``
+        Estimate for a single spectrum, or arrays of estimates for a batch.
+    """
+    spectrum = np.asarray(spectrum, dtype=float)
+    single = spectrum.ndim == 1
+    spectrum = np.atleast_2d(spectrum)
+    num_frames, n = spectrum.shape
+    rows = np.arange(num_frames)
+
+    # 10*log10(|fft|) -> |fft|**2
+    power = 10**(spectrum / 5)
+    # noiseless input, e.g. from a simulation, has a noise estimate of 0;
+    # bins whose power underflows to 0 get an SNR of -inf
+    noise = np.maximum(_cfar_noise(power, guard, train), np.finfo(float).tiny)
+    with np.errstate(divide="ignore"):
+        snr = 10*np.log10(power / noise)
+    snr[:, np.abs(frequency) < min_frequency] = -np.inf
+
+    candidates = np.where(snr >= threshold, spectrum, -np.inf)
+    peak = np.argmax(candidates, axis=-1)
+    detected = np.isfinite(candidates[rows, peak])
+
+    # parabolic interpolation on the dB values of the peak and its neighbours
+    left = spectrum[rows, (peak - 1) % n]
+    center = spectrum[rows, peak]
+    right = spectrum[rows, (peak + 1) % n]
+    curvature = left - 2*center + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(curvature < 0, 0.5*(left - right) / curvature, 0)
+    bin_width = frequency[1] - frequency[0]
+    peak_frequency = np.where(
+        detected, frequency[peak] + offset*bin_width, np.nan)
+
+    estimate = DopplerEstimate(
+        detected=detected,
+        frequency=peak_frequency,
+        velocity=peak_frequency * SPEED_OF_LIGHT / (2*rf_frequency),
+        snr=np.where(detected, snr[rows, peak], np.nan),
+        direction=np.select([~detected, peak_frequency < 0],
+                            ["none", "depart"], "approach"))
+    if single:
+        return DopplerEstimate(*(field[0] for field in estimate))
+    return estimate
@@ -44,16 +44,20 @@
 #         $ pip install scipy matplotlib
 #     or you use the Anaconda Python distribution which already includes
 #     matplotlib: https://www.anaconda.com/products/individual
+#     scipy is only imported to compute the window on the first run; the
+#     window is cached in doppler.DEFAULT_PLAN_DIR.
 
 from ltr11 import *
+from doppler import DEFAULT_PLAN_DIR, get_plan
 import numpy as np
-from scipy import signal
 import matplotlib.pyplot as plt
 
 if __name__ == "__main__":
     num_samples = 512                            # 512 samples
-    window = signal.chebwin(num_samples, at=150) # Chebychev window
     sampling_frequency = 2000                    # sampling frequency of 2kHz
+    plan = get_plan(num_samples, "chebwin", 150, sampling_frequency,
+                    DEFAULT_PLAN_DIR)
+    window = plan.window                         # Chebychev window
 
     device_config = {
         "mode": 0,           # continuous wave mode
@@ -91,7 +95,6 @@ if __name__ == "__main__":
 
     # 9. compute Doppler spectrum
     doppler = 10*np.log10(np.abs(np.fft.fft(signal_complex)))
-    frequency = np.fft.fftfreq(num_samples, 1/sampling_frequency)
 
     # 10. plot Doppler spectrum
     # Note that the fftshift is just needed to avoid an extra line in the plot,
@@ -101,7 +104,7 @@ if __name__ == "__main__":
     #
     # Approaching targets result in a peak at positive frequencies, departing
     # targets result in a peak at negative frequencies.
-    plt.plot(np.fft.fftshift(frequency), np.fft.fftshift(doppler))
+    plt.plot(plan.frequency, doppler[plan.shift])
     plt.xlabel("frequency [Hz]")
     plt.ylabel("Doppler spectrum [dB]")
     plt.show()
@@ -0,0 +1,78 @@
+# This script does the following:
+#   1. Opens BGT60LTR11 radar device
+#   2. Sets configuration
+#   3. Starts data acquisition
+#   4. Feeds blocks of samples into a streaming Doppler spectrogram
+#   5. Stops data acquisition
+#   6. Plots the spectrogram
+#
+# Pass --sim to use the simulated device from ltr11_sim instead of a
+# RadarBaseboardMCU7.
+#
+# Dependencies:
+#   - matplotlib, scipy: For this script you need scipy and matplotlib installed. You can
+#     install both either using pip:
+#         $ pip install scipy matplotlib
+#     or you use the Anaconda Python distribution which already includes
+#     matplotlib: https://www.anaconda.com/products/individual
+#     scipy is only imported to compute the window on the first run; the
+#     window is cached in doppler.DEFAULT_PLAN_DIR.
+
+from ltr11 import *
+from ltr11_sim import BGT60LTR11Simulator, DopplerTarget
+from doppler import DEFAULT_PLAN_DIR, DopplerSpectrogram
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+
+if __name__ == "__main__":
+    num_samples = 512          # samples per frame
+    hop = 128                  # new frame every 128 samples
+    block_samples = 256        # samples fetched per call
+    duration = 10              # seconds
+    sampling_frequency = 2000  # sampling frequency of 2kHz
+
+    device_config = {
+        "mode": 0,           # continuous wave mode
+        "tx_power_level": 7, # 4.5dBm
+        "rx_if_gain": 8,     # 50dB
+        "adc": 1,            # ADCs of RadarBaseboardMCU7
+        "sampling_frequency": sampling_frequency
+    }
+
+    backend = None
+    if "--sim" in sys.argv:
+        backend = BGT60LTR11Simulator(targets=[
+            DopplerTarget(frequency=150, start=2, stop=5),
+            DopplerTarget(frequency=-80, amplitude=0.05, start=6, stop=8)])
+
+    spectrogram = DopplerSpectrogram(
+        num_samples, hop, sampling_frequency,
+        num_frames=duration*sampling_frequency//hop,
+        plan_dir=DEFAULT_PLAN_DIR)
+
+    # 1. open the device
+    with BGT60LTR11(backend=backend) as ltr11:
+        # 2. set configuration
+        ltr11.set_configuration(**device_config)
+
+        # 3. start data acquisition
+        ltr11.start_data_acquisition()
+
+        # 4. fetch blocks and compute all frames they complete
+        ifi, ifq = np.empty(block_samples), np.empty(block_samples)
+        for _ in range(duration*sampling_frequency//block_samples):
+            ltr11.get_data(block_samples, ifi=ifi, ifq=ifq)
+            spectrogram.push(ifi, ifq)
+
+        # 5. stop data acquisition
+        ltr11.stop_data_acquisition()
+
+    # 6. plot the spectrogram, time on the x-axis
+    times = spectrogram.times()
+    plt.pcolormesh(times, spectrogram.frequency, spectrogram.frames().T,
+                   shading="nearest")
+    plt.xlabel("time [s]")
+    plt.ylabel("frequency [Hz]")
+    plt.colorbar(label="Doppler spectrum [dB]")
+    plt.show()
@@ -0,0 +1,156 @@
+"""
+Stand-in for RPi.GPIO with simulated HC-SR04 ultrasonic sensors
+
+Implements the part of the RPi.GPIO API used by the sonar code (setmode,
+setup, output, input, add_event_detect, remove_event_detect, cleanup) so
+that it runs and can be benchmarked off the Raspberry Pi. A falling edge on
+a trigger pin makes the sensor wired to it answer like an HC-SR04: after a
+short delay its echo pin goes high for the round-trip time of sound to the
+simulated distance. Edge callbacks are called from a background thread, as
+RPi.GPIO does.
+
+    gpio = FakeGPIO({18: FakeSensor(24, distance=30)})
+    sonar = Sonar([18], [24], gpio=gpio)
+"""
+
+import heapq
+import random
+import threading
+import time
+
+from sonar import SPEED_OF_SOUND
+
+__all__ = ["FakeSensor", "FakeGPIO"]
+
+
+class FakeSensor:
+    """Simulated HC-SR04 wired to an echo pin"""
+
+    def __init__(self, echo_pin, distance, noise=0.0, drop_rate=0.0,
+                 delay=450e-6):
+        """
+        Parameters
+        ----------
+        echo_pin: int
+            Pin the echo output is wired to.
+
+        distance: float
+            Distance to the target in cm.
+
+        noise: float
+            Standard deviation of the distance in cm.
+
+        drop_rate: float
+            Probability that a trigger gets no echo at all.
+
+        delay: float
+            Time in s from the trigger to the rising edge of the echo.
+        """
+        self.echo_pin = echo_pin
+        self.distance = distance
+        self.noise = noise
+        self.drop_rate = drop_rate
+        self.delay = delay
+
+
+class FakeGPIO:
+    """RPi.GPIO lookalike driving simulated ultrasonic sensors"""
+
+    BCM = "BCM"
+    BOARD = "BOARD"
+    IN = "IN"
+    OUT = "OUT"
+    RISING = "RISING"
+    FALLING = "FALLING"
+    BOTH = "BOTH"
+    PUD_DOWN = "PUD_DOWN"
+    PUD_UP = "PUD_UP"
+    PUD_OFF = "PUD_OFF"
+
+    def __init__(self, sensors=None, seed=None):
+        """
+        Parameters
+        ----------
+        sensors: dict
+            ``FakeSensor`` per trigger pin.
+
+        seed: int
+            Seed of the noise and drop generator.
+        """
+        self.sensors = dict(sensors or {})
+        self._random = random.Random(seed)
+        self._levels = {}
+        # (rise, fall) of the last echo pulse per echo pin
+        self._pulses = {}
+        self._callbacks = {}
+        self._events = []
+        self._lock = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="FakeGPIO", daemon=True)
+        self._thread.start()
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=0):
+        with self._lock:
+            self._levels.setdefault(pin, initial)
+
+    def input(self, pin):
+        # echo levels follow the clock, independent of the event thread
+        now = time.perf_counter()
+        with self._lock:
+            if pin in self._pulses:
+                rise, fall = self._pulses[pin]
+                return int(rise <= now < fall)
+            return self._levels.get(pin, 0)
+
+    def output(self, pin, value):
+        with self._lock:
+            falling = self._levels.get(pin, 0) and not value
+            self._levels[pin] = int(bool(value))
+            sensor = self.sensors.get(pin)
+            if not falling or sensor is None:
+                return
+            if self._random.random() < sensor.drop_rate:
+                return
+            distance = max(self._random.gauss(sensor.distance, sensor.noise), 0)
+            rise = time.perf_counter() + sensor.delay
+            fall = rise + 2 * distance / SPEED_OF_SOUND
+            self._pulses[sensor.echo_pin] = (rise, fall)
+            heapq.heappush(self._events, (rise, sensor.echo_pin, 1))
+            heapq.heappush(self._events, (fall, sensor.echo_pin, 0))
+            self._lock.notify()
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self._lock:
+            self._callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self._callbacks.pop(pin, None)
+
+    def cleanup(self, pins=None):
+        with self._lock:
+            self._callbacks.clear()
+
+    def _run(self):
+        # switches echo levels at their scheduled times and calls the edge
+        # callbacks, like the RPi.GPIO event thread
+        while True:
+            with self._lock:
+                while not self._events:
+                    self._lock.wait()
+                at, pin, level = self._events[0]
+                wait = at - time.perf_counter()
+                if wait > 0:
+                    self._lock.wait(wait)
+                    continue
+                heapq.heappop(self._events)
+                edge, callback = self._callbacks.get(pin, (None, None))
+            if callback is not None and edge in (
+                    self.BOTH, self.RISING if level else self.FALLING):
+                callback(pin)
@@ -0,0 +1,121 @@
+"""
+Fill level of the bins from noisy ultrasonic distances
+
+``FillLevelEstimator`` keeps the last ``window`` distances of every sensor in
+one NumPy array and updates all sensors of all bins at once:
+
+1. Hampel filter: a distance further than ``k`` scaled median absolute
+   deviations from the median of its window is an outlier (a spurious or
+   multipath echo) and is ignored. Outliers stay in the window, so a real
+   change of the level becomes the median after half a window.
+2. The filtered distance of a sensor is the mean of the remaining distances
+   of its window; missed echoes (NaN) are ignored.
+3. Hysteresis: a compartment becomes full when the distance drops below
+   ``full_distance`` and only counts as not full again once it rises above
+   ``full_distance + hysteresis``, so noise around the threshold does not
+   flip the status.
+4. The fill percentage maps the distance linearly from ``empty_distance``
+   (0%) to ``full_distance`` (100%).
+
+    estimator = FillLevelEstimator(3, empty_distance=50)
+    distance, percent, full = estimator.update(scheduler.distances())
+"""
+
+import warnings
+import numpy as np
+
+__all__ = ["FillLevelEstimator"]
+
+# scales the median absolute deviation to the standard deviation of
+# normally distributed data
+MAD_SCALE = 1.4826
+
+
+class FillLevelEstimator:
+    """Hampel/median filter with hysteresis over all sensors at once"""
+
+    def __init__(self, shape, window=9, k=3.0, min_deviation=1.0,
+                 full_distance=12.0, hysteresis=3.0, empty_distance=50.0):
+        """
+        Parameters
+        ----------
+        shape: int or tuple
+            Shape of the distance arrays, e.g. the number of sensors or
+            (bins, sensors per bin).
+
+        window: int
+            Number of distances kept per sensor.
+
+        k: float
+            Outlier threshold in scaled median absolute deviations.
+
+        min_deviation: float
+            Lower bound in cm of the scaled deviation, so that a window of
+            identical distances does not reject every change.
+
+        full_distance: float or np.ndarray
+            Distance in cm below which a compartment becomes full.
+
+        hysteresis: float or np.ndarray
+            A full compartment becomes not full above
+            ``full_distance + hysteresis``.
+
+        empty_distance: float or np.ndarray
+            Distance in cm of an empty compartment (0%).
+        """
+        self.shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        self.k = k
+        self.min_deviation = min_deviation
+        self.full_distance = np.broadcast_to(full_distance, self.shape)
+        self.hysteresis = np.broadcast_to(hysteresis, self.shape)
+        self.empty_distance = np.broadcast_to(empty_distance, self.shape)
+        self.history = np.full((window,) + self.shape, np.nan)
+        self.full = np.zeros(self.shape, dtype=bool)
+        self.outliers = np.zeros(self.shape, dtype=int)
+        self.updates = 0
+
+    @staticmethod
+    def _median(a):
+        # all-NaN windows (no echo yet) give NaN without a warning
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmedian(a, axis=0)
+
+    def update(self, distances):
+        """Add one distance per sensor and return the filtered state.
+
+        Parameters
+        ----------
+        distances: np.ndarray
+            Distances in cm of `shape`, NaN for missed echoes.
+
+        Returns
+        -------
+        tuple
+            (distance, percent, full) arrays of `shape`: filtered distance
+            in cm, fill level in percent and the full flags. Sensors without
+            any echo in their window have NaN distance and percentage.
+        """
+        x = np.asarray(distances, dtype=float).reshape(self.shape)
+        self.history[self.updates % len(self.history)] = x
+        self.updates += 1
+
+        median = self._median(self.history)
+        deviation = np.maximum(
+            MAD_SCALE * self._median(np.abs(self.history - median)),
+            self.min_deviation)
+        # NaN comparisons are False: missed echoes are never inliers
+        inlier = np.abs(self.history - median) <= self.k * deviation
+        newest = inlier[(self.updates - 1) % len(self.history)]
+        self.outliers += ~newest & ~np.isnan(x)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            distance = np.nanmean(np.where(inlier, self.history, np.nan), axis=0)
+
+        valid = ~np.isnan(distance)
+        self.full[valid & (distance < self.full_distance)] = True
+        self.full[valid & (distance > self.full_distance + self.hysteresis)] = False
+        percent = np.clip(
+            100 * (self.empty_distance - distance)
+            / (self.empty_distance - self.full_distance), 0, 100)
+        return distance, percent, self.full.copy()
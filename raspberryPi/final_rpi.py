@@ -1,59 +1,114 @@
-# from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-import tflite_runtime.interpreter as tflite
-import numpy as np
 import cv2
-import picam_fps
 import time
-from time import sleep
+import itertools
+import queue
+import threading
 import smbus
-cap = picam_fps.PiVideoStream().start()
+from classifier import WasteClassifier
+from capture_trigger import StillnessTrigger
+from camera import ThreadedCapture
+from i2c_protocol import ARDUINO_ADDRESS, I2CCommandDispatcher, I2CWriteError
+from pipeline import Pipeline, StageFailure
+cap = ThreadedCapture(0).start()
 time.sleep(2.0)
-interpreter = tflite.Interpreter(model_path="/home/pi/Documents/waste20220311_nasnet.tflite")
-interpreter.allocate_tensors()
-classes=['can','paperbox','PET']
+classifier = WasteClassifier()
+trigger = StillnessTrigger(cap.read, timeout=3.0)
 rpi = smbus.SMBus(1)
-
-arduino = 0x04
+# poll the Arduino every 50ms; pass irq_pin to block on an interrupt line
+dispatcher = I2CCommandDispatcher(rpi, ARDUINO_ADDRESS, poll_interval=0.05)
 
 result=[]
+burst_frames = 5    # classify up to 5 frames per item
+min_margin = 0.5    # stop once the top class leads by 0.5
+
+codes = {'paperbox': 'p', 'can': 'c', 'PET': 'b'}
+last_seq = 0    # camera frame the newest item was captured with
+shown = queue.Queue(maxsize=1)  # classified frame for the main thread to show
+
+# the item is captured, preprocessed, classified and reported in separate
+# threads, so that the next item is captured while this one is classified
+def capture(item):
+    global last_seq
+    _, waited, timed_out = trigger.wait()
+    if timed_out:
+        print(f"item did not settle within {waited:.1f}s, classifying anyway")
+    frame, _, last_seq = cap.latest()
+    # copy: the capture ring is reused while the frame waits in the queues
+    return last_seq, frame.copy()
+
+def prepare(item):
+    seq, img = item
+    return seq, img, classifier.prepare(img)
+
+def later_frames(seq):
+    # further frames for an ambiguous item, taken and prepared only when the
+    # burst asks for them and only until the next item has been captured
+    item_seq = seq
+    while last_seq == item_seq:
+        latest = cap.wait(seq, timeout=1.0)
+        if latest is None:
+            return
+        frame, _, seq = latest
+        yield classifier.prepare(frame)
+
+def infer(item):
+    seq, img, tensor = item
+    frames = itertools.chain([tensor], later_frames(seq))
+    return img, classifier.classify_burst(
+        frames, burst_frames, min_margin, prepared=True)
+
+def actuate(item):
+    if isinstance(item, StageFailure):
+        # nothing to sort it by: leave it out of the results
+        print(f"{item.stage} failed: {item.error!r}, item skipped")
+        return
+    img, burst = item
+    print(f"confidence {burst.confidence:.2f} after {burst.frames} frames"
+          f" in {1e3*burst.latency:.0f}ms")
+    try:
+        shown.put_nowait(img)
+    except queue.Full:
+        pass
+    print(burst.label)
+    if burst.label in codes:
+        result.append(codes[burst.label])
+
+pipeline = Pipeline([("capture", capture), ("preprocess", prepare),
+                     ("inference", infer), ("actuation", actuate)]).start()
+
+@dispatcher.on('w')
+def classify_item():
+    pipeline.put(time.monotonic())
+
+@dispatcher.on('s')
+def send_results():
+    # include the items still on their way through the pipeline
+    pipeline.join()
+    try:
+        dispatcher.write_frames(result)
+    except I2CWriteError as e:
+        # keep what was not delivered for the next 's'
+        del result[:e.delivered]
+        raise
+    result.clear()
+
+# HighGUI only works from the main thread: the commands are dispatched in
+# the background while the main thread shows the classified frames
+commands = threading.Thread(target=dispatcher.run, name="I2CCommandDispatcher")
+commands.start()
+while commands.is_alive():
+    try:
+        cv2.imshow('image', shown.get(timeout=0.05))
+    except queue.Empty:
+        pass
+    if cv2.waitKey(1) & 0xFF == ord('q'):
+        dispatcher.stop()
+commands.join()
 
-def writeData(value):
-    rpi.write_byte(arduino, value)
-    return -1
-
-def readData():
-    number = rpi.read_byte(arduino)
-    return number
- 
-while(True):
-    if readData()=='w':
-        sleep(3.0)
-        img=cap.read()
-        img_tensor=image.img_to_array(img)
-        img_tensor=img_tensor/255.
-        img_tensor=np.expand_dims(img_tensor,axis=0)
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
-        interpreter.set_tensor(input_details[0]['index'], img_tensor)
-        interpreter.invoke()
-        output_data = interpreter.get_tensor(output_details[0]['index'])
-        cv2.imshow('image', img)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            cv2.destroyAllWindows()
-            cap.stop()
-            break
-        output=classes[np.argmax(output_data)]
-        print(output)
-        if output=='paperbox':
-            result.append('p')
-        elif output=='can':
-            result.append('c')
-        elif output=='PET':
-            result.append('b')
-    if readData()=='s':
-        for r in result:
-            writeData(r)
-        result.clear()
-        
+pipeline.stop()
+for name, stats in pipeline.stats.items():
+    print(f"{name:>10}: {stats.items} items, {stats.failures} failed,"
+          f" {stats.throughput:.1f} items/s,"
+          f" idle {stats.idle:.1f}s, blocked {stats.blocked:.1f}s")
 cv2.destroyAllWindows()
+cap.stop()
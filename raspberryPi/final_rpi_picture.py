@@ -1,54 +1,46 @@
-# from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-import tflite_runtime.interpreter as tflite
-import numpy as np
-import cv2
-import picam_fps
-import time
-from time import sleep
-from picamera import PiCamera
 import smbus
-interpreter = tflite.Interpreter(model_path="/home/pi/Documents/waste20220311_nasnet.tflite")
-interpreter.allocate_tensors()
-classes=['can','paperbox','PET']
-camera=PiCamera()
+from classifier import WasteClassifier
+from capture_trigger import StillnessTrigger
+from camera import ThreadedCapture
+from i2c_protocol import ARDUINO_ADDRESS, I2CCommandDispatcher, I2CWriteError
+classifier = WasteClassifier()
 rpi = smbus.SMBus(1)
-
-arduino = 0x04
+# poll the Arduino every 50ms; pass irq_pin to block on an interrupt line
+dispatcher = I2CCommandDispatcher(rpi, ARDUINO_ADDRESS, poll_interval=0.05)
 
 result=[]
-cap=cv2.VideoCapture(0)
+burst_frames = 5    # classify up to 5 frames per item
+min_margin = 0.5    # stop once the top class leads by 0.5
+cap = ThreadedCapture(0).start()
+trigger = StillnessTrigger(cap.read, timeout=2.0)
+
+@dispatcher.on('w')
+def classify_item():
+    _, waited, timed_out = trigger.wait()
+    if timed_out:
+        print(f"item did not settle within {waited:.1f}s, classifying anyway")
+    burst = classifier.classify_burst(
+        cap.frames(timeout=1.0), burst_frames, min_margin)
+    output = burst.label
+    print(f"confidence {burst.confidence:.2f} after {burst.frames} frames"
+          f" in {1e3*burst.latency:.0f}ms")
+    print(output)
+    if output=='paperbox':
+        result.append('p')
+    elif output=='can':
+        result.append('c')
+    elif output=='PET':
+        result.append('b')
 
-def writeData(value):
-    rpi.write_byte(arduino, value)
-    return -1
+@dispatcher.on('s')
+def send_results():
+    try:
+        dispatcher.write_frames(result)
+    except I2CWriteError as e:
+        # keep what was not delivered for the next 's'
+        del result[:e.delivered]
+        raise
+    result.clear()
 
-def readData():
-    number = rpi.read_byte(arduino)
-    return number
- 
-while(True):
-    if readData()=='w':
-        sleep(2.0)
-        ret, img = cap.read()
-        img=cv2.resize(img,(224,224))
-        img_tensor=image.img_to_array(img)
-        img_tensor=img_tensor/255.
-        img_tensor=np.expand_dims(img_tensor,axis=0)
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
-        interpreter.set_tensor(input_details[0]['index'], img_tensor)
-        interpreter.invoke()
-        output_data = interpreter.get_tensor(output_details[0]['index'])
-        output=classes[np.argmax(output_data)]
-        print(output)
-        if output=='paperbox':
-            result.append('p')
-        elif output=='can':
-            result.append('c')
-        elif output=='PET':
-            result.append('b')
-    if readData()=='s':
-        for r in result:
-            writeData(r)
-        result.clear()
+dispatcher.run()
+cap.stop()
@@ -0,0 +1,372 @@
+"""
+Command protocol with the Arduino on the I2C bus
+
+Overview
+--------
+
+The Arduino at address 0x04 answers every one-byte read with its pending
+command as an ASCII character ('w': an item is waiting to be classified,
+'s': send the results), or with 0 when it has nothing to say.
+
+``I2CCommandDispatcher`` reads exactly one byte per poll, decodes it and calls
+the handler registered for the command. Between polls it either sleeps for
+``poll_interval`` or, if the Arduino drives an interrupt line, blocks on that
+GPIO pin until the Arduino signals a command, so the bus stays idle while
+nothing happens:
+
+    dispatcher = I2CCommandDispatcher(smbus.SMBus(1))
+
+    @dispatcher.on('w')
+    def classify_item():
+        ...
+
+    dispatcher.run()
+
+Results go back in framed block writes (``write_frames``): every
+``write_i2c_block_data`` carries the ``FRAME_REGISTER`` command byte followed
+by a sequence byte, the payload length, up to ``MAX_PAYLOAD`` payload bytes
+and a checksum, so that a flush of many items takes a few transactions
+instead of one per item. A chunk the Arduino does not acknowledge is written
+again on its own.
+
+The sequence byte is the index, modulo 256, of the frame's first value in
+all values the dispatcher has delivered so far. The Arduino counts the
+values it applied and drops the first ``(applied - sequence) % 256`` values
+of a frame, or the whole frame if that is not less than its length, so that
+a frame written again after a lost acknowledgement is not applied twice.
+
+``FakeSMBus`` stands in for ``smbus.SMBus`` off the Raspberry Pi: it replays
+queued commands and records writes and the number of bus transactions.
+"""
+
+import random
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+
+__all__ = ["ARDUINO_ADDRESS", "FRAME_REGISTER", "MAX_PAYLOAD",
+           "DispatcherStats", "I2CCommandDispatcher", "I2CWriteError",
+           "checksum", "encode_frames", "FakeSMBus"]
+
+ARDUINO_ADDRESS = 0x04
+# command byte of a framed block write
+FRAME_REGISTER = ord('R')
+# SMBus block writes carry at most 32 data bytes: sequence, length, payload,
+# checksum
+SMBUS_BLOCK_MAX = 32
+MAX_PAYLOAD = SMBUS_BLOCK_MAX - 3
+
+
+class I2CWriteError(OSError):
+    """A chunk was not acknowledged after all retries
+
+    ``delivered`` is the number of values acknowledged before that chunk.
+    """
+    delivered = 0
+
+
+DispatcherStats = namedtuple(
+    "DispatcherStats", ["polls", "commands", "unknown", "errors", "failures"])
+DispatcherStats.__doc__ = '''\
+Statistics of an ``I2CCommandDispatcher``
+
+Members:
+- ``polls``: number of one-byte reads from the bus
+- ``commands``: number of commands dispatched to a handler
+- ``unknown``: number of non-idle bytes without a handler
+- ``errors``: number of failed reads and writes (OSError from the bus)
+- ``failures``: number of handlers that raised an exception'''
+
+
+class I2CCommandDispatcher:
+    """Polls the Arduino for one-byte commands and dispatches them"""
+
+    def __init__(self, bus, address=ARDUINO_ADDRESS, poll_interval=0.05,
+                 irq_pin=None, gpio=None):
+        """
+        Parameters
+        ----------
+        bus: smbus.SMBus
+            Opened bus (or ``FakeSMBus``).
+
+        address: int
+            I2C address of the Arduino.
+
+        poll_interval: float
+            Time in s between polls. With an interrupt line this is the
+            longest time to block on it before polling anyway, so that a
+            missed edge delays a command at most this long.
+
+        irq_pin: int
+            BCM number of a GPIO pin the Arduino pulls high when it has a
+            command pending, or None to poll at `poll_interval`.
+
+        gpio: module
+            GPIO module used for `irq_pin`, RPi.GPIO by default.
+        """
+        self.bus = bus
+        self.address = address
+        self.poll_interval = poll_interval
+        self.irq_pin = irq_pin
+        self.handlers = {}
+        self._stopped = threading.Event()
+        self._polls = 0
+        self._commands = 0
+        self._unknown = 0
+        self._errors = 0
+        self._failures = 0
+        # index of the next value to deliver, see the sequence byte
+        self._next_value = 0
+
+        self.gpio = gpio
+        if irq_pin is not None:
+            if self.gpio is None:
+                import RPi.GPIO
+                self.gpio = RPi.GPIO
+            self.gpio.setmode(self.gpio.BCM)
+            self.gpio.setup(irq_pin, self.gpio.IN,
+                            pull_up_down=self.gpio.PUD_DOWN)
+
+    def on(self, command, handler=None):
+        """Register `handler` for a one-character `command`.
+
+        Can be used as a decorator: ``@dispatcher.on('w')``.
+        """
+        if handler is None:
+            return lambda handler: self.on(command, handler)
+        self.handlers[command] = handler
+        return handler
+
+    def read_command(self):
+        """Read one byte and return the command, or None if idle."""
+        self._polls += 1
+        try:
+            value = self.bus.read_byte(self.address)
+        except OSError:
+            # the Arduino did not acknowledge, e.g. while it is busy
+            self._errors += 1
+            return None
+        if value == 0 or value == 0xFF:
+            return None
+        return chr(value)
+
+    def poll(self):
+        """Read one command and dispatch it; returns the command or None.
+
+        An exception raised by the handler is printed and counted in
+        ``stats.failures``; it does not stop ``run``.
+        """
+        command = self.read_command()
+        if command is None:
+            return None
+        handler = self.handlers.get(command)
+        if handler is None:
+            self._unknown += 1
+            return command
+        self._commands += 1
+        try:
+            handler()
+        except Exception:
+            # a failing item must not stop the dispatcher for the next ones
+            self._failures += 1
+            print(f"handler of {command!r} failed:")
+            traceback.print_exc()
+        return command
+
+    def wait(self):
+        """Wait until the next poll is due; returns False once stopped."""
+        if self.irq_pin is None:
+            return not self._stopped.wait(self.poll_interval)
+        if self.gpio.input(self.irq_pin):
+            # a command is already pending
+            return not self._stopped.is_set()
+        self.gpio.wait_for_edge(self.irq_pin, self.gpio.RISING,
+                                timeout=max(int(1e3 * self.poll_interval), 1))
+        return not self._stopped.is_set()
+
+    def run(self):
+        """Poll and dispatch commands until ``stop`` is called."""
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            self.poll()
+            if not self.wait():
+                break
+
+    def stop(self):
+        """Make ``run`` return; may be called from a handler."""
+        self._stopped.set()
+
+    def write(self, value):
+        """Send one byte (an int or a one-character str) to the Arduino."""
+        if isinstance(value, str):
+            value = ord(value)
+        self.bus.write_byte(self.address, value)
+
+    def write_frames(self, values, retries=3, retry_delay=0.01):
+        """Send bytes (ints or one-character strs) in framed block writes.
+
+        Parameters
+        ----------
+        values: iterable
+            Bytes to send, e.g. the result list of the sorter.
+
+        retries: int
+            Number of times a chunk is written again after an OSError.
+
+        retry_delay: float
+            Time in s to wait before retrying a chunk.
+
+        Returns
+        -------
+        int
+            Number of bus transactions used.
+
+        Raises
+        ------
+        I2CWriteError
+            If a chunk still fails after `retries` retries. Its
+            ``delivered`` values were delivered before; send the others
+            again, the Arduino drops any it got despite the error.
+        """
+        transactions = 0
+        delivered = 0
+        for frame in encode_frames(values, self._next_value):
+            for attempt in range(retries + 1):
+                transactions += 1
+                try:
+                    self.bus.write_i2c_block_data(
+                        self.address, FRAME_REGISTER, frame)
+                    break
+                except OSError as e:
+                    error = e
+                    self._errors += 1
+                    if attempt < retries:
+                        time.sleep(retry_delay)
+            else:
+                failed = I2CWriteError(
+                    f"Chunk not acknowledged after {retries} retries: "
+                    f"{error}")
+                failed.delivered = delivered
+                raise failed from error
+            delivered += frame[1]
+            self._next_value += frame[1]
+        return transactions
+
+    @property
+    def stats(self):
+        """Current ``DispatcherStats``."""
+        return DispatcherStats(self._polls, self._commands, self._unknown,
+                               self._errors, self._failures)
+
+
+def checksum(data):
+    """Two's complement of the byte sum, so that all bytes sum to 0 mod 256."""
+    return -sum(data) & 0xFF
+
+
+def encode_frames(values, first=0):
+    """Split bytes into frames [sequence, length, payload..., checksum].
+
+    The sequence byte is the index of the frame's first value modulo 256,
+    counted from `first`. The checksum covers the sequence byte, the length
+    and the payload. Frames are at most ``SMBUS_BLOCK_MAX`` bytes long; an
+    empty input gives no frames.
+    """
+    data = bytes(ord(v) if isinstance(v, str) else v for v in values)
+    frames = []
+    for start in range(0, len(data), MAX_PAYLOAD):
+        frame = [(first + start) & 0xFF, len(data[start:start + MAX_PAYLOAD])]
+        frame += data[start:start + MAX_PAYLOAD]
+        frame.append(checksum(frame))
+        frames.append(frame)
+    return frames
+
+
+class FakeSMBus:
+    """In-memory stand-in for smbus.SMBus talking to the Arduino"""
+
+    def __init__(self, transaction_time=0.0, clock=time.monotonic,
+                 error_rate=0.0, seed=None):
+        """
+        Parameters
+        ----------
+        transaction_time: float
+            Time in s every transaction takes, e.g. 2e-4 for a one-byte read
+            at 100kHz.
+
+        error_rate: float
+            Probability that a write is not acknowledged (raises OSError).
+
+        seed: int
+            Seed of the error generator.
+
+        clock: callable
+            Time source in s for ``schedule``.
+        """
+        self.transaction_time = transaction_time
+        self.clock = clock
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.transactions = 0
+        self.written = []
+        self._pending = deque()
+        self._scheduled = deque()
+        self._lock = threading.Lock()
+
+    def push(self, *commands):
+        """Queue commands (str or int) for the next reads."""
+        with self._lock:
+            self._pending.extend(
+                ord(c) if isinstance(c, str) else c for c in commands)
+
+    def schedule(self, at, command):
+        """Queue `command` to become readable at time `at` (of `clock`).
+
+        Commands must be scheduled in increasing time order.
+        """
+        with self._lock:
+            self._scheduled.append((at, command))
+
+    def pending(self):
+        """True if a command is readable now."""
+        with self._lock:
+            self._release()
+            return bool(self._pending)
+
+    def _release(self):
+        now = self.clock()
+        while self._scheduled and self._scheduled[0][0] <= now:
+            command = self._scheduled.popleft()[1]
+            self._pending.append(
+                ord(command) if isinstance(command, str) else command)
+
+    def _transaction(self):
+        self.transactions += 1
+        if self.transaction_time:
+            time.sleep(self.transaction_time)
+
+    def read_byte(self, address):
+        self._transaction()
+        with self._lock:
+            self._release()
+            return self._pending.popleft() if self._pending else 0
+
+    def _write_error(self):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise OSError(121, "Remote I/O error")
+
+    def write_byte(self, address, value):
+        self._transaction()
+        self._write_error()
+        self.written.append(value)
+
+    def write_i2c_block_data(self, address, register, data):
+        self._transaction()
+        if len(data) > SMBUS_BLOCK_MAX:
+            raise OSError(22, "Invalid argument")
+        self._write_error()
+        self.written.append((register, list(data)))
+
+    def close(self):
+        pass
@@ -80,6 +80,7 @@ You can view this documentation using pdoc:
 
 
 from ctypes import *
+from ctypes import _Pointer
 import numpy as np
 from collections import namedtuple
 import os
@@ -91,8 +92,8 @@ import platform
 #   from BGT60LTR11 import *
 # would import all objects, including the ones from ctypes. To avoid name space
 # pollution, we list what symbols should be exported.
-__all__ = ["BGT60LTR11Error", "BGT60LTR11FIFOError",
-           "BGT60LTR11Detection", "BGT60LTR11"]
+__all__ = ["BGT60LTR11Error", "BGT60LTR11FIFOError", "BGT60LTR11TimeoutError",
+           "BGT60LTR11Detection", "BGT60LTR11Library", "BGT60LTR11", "deref"]
 
 
 class BGT60LTR11Error(Exception):
@@ -105,6 +106,11 @@ class BGT60LTR11FIFOError(BGT60LTR11Error):
     pass
 
 
+class BGT60LTR11TimeoutError(BGT60LTR11Error):
+    """BGT60LTR11Timeout exception class"""
+    pass
+
+
 BGT60LTR11Detection = namedtuple(
     "BGT60LTR11Detection", ["motion", "direction"])
 BGT60LTR11Detection.__doc__ = '''\
@@ -153,92 +159,138 @@ class BGT60ltr11DeviceInfo(Structure):
                 ]
 
 
-# absolute path to library (*.dll or *.so depending on the platform)
-# we expect that the library is in the same directory as this file
-if os.name == "nt":
-    # If on Windows we require a 64bit system
-    if sys.maxsize < 2**32:
-        raise RuntimeError("This module requires a 64bit version of Python")
-    libname = "ltr11.dll"
-elif platform.system() == "Linux":
-    machine = platform.machine()
-    if machine == "armv7l":
-        libname = "libltr11_raspi.so"
-    elif machine == "x86_64":
-        libname = "libltr11_amd64.so"
+def _library_path():
+    """Absolute path to library (*.dll or *.so depending on the platform).
+
+    We expect that the library is in the same directory as this file.
+    """
+    if os.name == "nt":
+        # If on Windows we require a 64bit system
+        if sys.maxsize < 2**32:
+            raise RuntimeError("This module requires a 64bit version of Python")
+        libname = "ltr11.dll"
+    elif platform.system() == "Linux":
+        machine = platform.machine()
+        if machine == "armv7l":
+            libname = "libltr11_raspi.so"
+        elif machine == "x86_64":
+            libname = "libltr11_amd64.so"
+        else:
+            raise RuntimeError(f"Not supported platform: {machine}")
     else:
-        raise RuntimeError(f"Not supported platform: {machine}")
-else:
-    raise RuntimeError("Unsupported operating system: {}".format(platform.system()))
+        raise RuntimeError("Unsupported operating system: {}".format(platform.system()))
+
+    return os.path.dirname(os.path.abspath(__file__)) + os.path.sep + libname
+
+
+def deref(arg):
+    """Return the ctypes object behind byref() or pointer().
+
+    For Python backends: the ``ltr11_*`` functions are called with the
+    output arguments wrapped in byref() as for the shared library.
+    """
+    if isinstance(arg, _Pointer):
+        return arg.contents
+    return arg._obj
+
+
+class BGT60LTR11Library:
+    """ctypes bindings of the ltr11 library.
+
+    This is the backend ``BGT60LTR11`` uses by default; it talks to a
+    RadarBaseboardMCU7 over USB. Any other object providing the same
+    ``ltr11_*`` functions, taking the same ctypes arguments, can be passed as
+    `backend` to ``BGT60LTR11`` instead, for example the simulator in
+    ``ltr11_sim``.
+    """
+
+    def __init__(self, path=None):
+        """Load the library from `path` or from the directory of this file."""
+        lib = CDLL(path or _library_path())
 
-dllabspath = os.path.dirname(os.path.abspath(
-    __file__)) + os.path.sep + libname
-libltr = CDLL(dllabspath)
+        self.ltr11_open = lib.ltr11_open
+        self.ltr11_open.restype = c_void_p
+        self.ltr11_open.argtypes = [c_char_p]
 
-c_ltr11_open = libltr.ltr11_open
-c_ltr11_open.restype = c_void_p
-c_ltr11_open.argtypes = [c_char_p]
+        self.ltr11_close = lib.ltr11_close
+        self.ltr11_close.restype = None
+        self.ltr11_close.argtypes = [c_void_p]
 
-c_ltr11_close = libltr.ltr11_close
-c_ltr11_close.restype = None
-c_ltr11_close.argtypes = [c_void_p]
+        self.ltr11_get_list = lib.ltr11_get_list
+        self.ltr11_get_list.restype = c_int32
+        self.ltr11_get_list.argtypes = [c_char_p, c_size_t]
 
-c_ltr11_get_list = libltr.ltr11_get_list
-c_ltr11_get_list.restype = c_int32
-c_ltr11_get_list.argtypes = [c_char_p, c_size_t]
+        self.ltr11_read_register = lib.ltr11_read_register
+        self.ltr11_read_register.restype = c_bool
+        self.ltr11_read_register.argtypes = [c_void_p, c_uint8, POINTER(c_uint16)]
 
-c_ltr11_read_register = libltr.ltr11_read_register
-c_ltr11_read_register.restype = c_bool
-c_ltr11_read_register.argtypes = [c_void_p, c_uint8, POINTER(c_uint16)]
+        self.ltr11_write_register = lib.ltr11_write_register
+        self.ltr11_write_register.restype = c_bool
+        self.ltr11_write_register.argtypes = [c_void_p, c_uint8, c_uint16]
 
-c_ltr11_write_register = libltr.ltr11_write_register
-c_ltr11_write_register.restype = c_bool
-c_ltr11_write_register.argtypes = [c_void_p, c_uint8, c_uint16]
+        self.ltr11_get_detection = lib.ltr11_get_detection
+        self.ltr11_get_detection.restype = c_bool
+        self.ltr11_get_detection.argtypes = [c_void_p, POINTER(c_bool), POINTER(c_bool)]
 
-c_ltr11_get_detection = libltr.ltr11_get_detection
-c_ltr11_get_detection.restype = c_bool
-c_ltr11_get_detection.argtypes = [c_void_p, POINTER(c_bool), POINTER(c_bool)]
+        self.ltr11_start_data_acquisition = lib.ltr11_start_data_acquisition
+        self.ltr11_start_data_acquisition.restype = c_bool
+        self.ltr11_start_data_acquisition.argtypes = [c_void_p]
 
-c_ltr11_start_data_acquisition = libltr.ltr11_start_data_acquisition
-c_ltr11_start_data_acquisition.restype = c_bool
-c_ltr11_start_data_acquisition.argtypes = [c_void_p]
+        self.ltr11_stop_data_acquisition = lib.ltr11_stop_data_acquisition
+        self.ltr11_stop_data_acquisition.restype = c_bool
+        self.ltr11_stop_data_acquisition.argtypes = [c_void_p]
 
-c_ltr11_stop_data_acquisition = libltr.ltr11_stop_data_acquisition
-c_ltr11_stop_data_acquisition.restype = c_bool
-c_ltr11_stop_data_acquisition.argtypes = [c_void_p]
+        self.ltr11_get_raw_data = lib.ltr11_get_raw_data
+        self.ltr11_get_raw_data.restype = c_bool
+        self.ltr11_get_raw_data.argtypes = [c_void_p, POINTER(
+            POINTER(c_double)), POINTER(c_size_t), POINTER(c_bool), c_uint16, c_uint16]
 
-c_ltr11_get_raw_data = libltr.ltr11_get_raw_data
-c_ltr11_get_raw_data.restype = c_bool
-c_ltr11_get_raw_data.argtypes = [c_void_p, POINTER(
-    POINTER(c_double)), POINTER(c_size_t), POINTER(c_bool), c_uint16, c_uint16]
+        self.ltr11_soft_reset = lib.ltr11_soft_reset
+        self.ltr11_soft_reset.restype = c_bool
+        self.ltr11_soft_reset.argtypes = [c_void_p]
 
-c_ltr11_soft_reset = libltr.ltr11_soft_reset
-c_ltr11_soft_reset.restype = c_bool
-c_ltr11_soft_reset.argtypes = [c_void_p]
+        self.ltr11_get_configuration = lib.ltr11_get_configuration
+        self.ltr11_get_configuration.restype = c_bool
+        self.ltr11_get_configuration.argtypes = [c_void_p, POINTER(Bgt60ltr11Config)]
 
-c_ltr11_get_configuration = libltr.ltr11_get_configuration
-c_ltr11_get_configuration.restype = c_bool
-c_ltr11_get_configuration.argtypes = [c_void_p, POINTER(Bgt60ltr11Config)]
+        self.ltr11_set_configuration = lib.ltr11_set_configuration
+        self.ltr11_set_configuration.restype = c_bool
+        self.ltr11_set_configuration.argtypes = [c_void_p, POINTER(Bgt60ltr11Config)]
 
-c_ltr11_set_configuration = libltr.ltr11_set_configuration
-c_ltr11_set_configuration.restype = c_bool
-c_ltr11_set_configuration.argtypes = [c_void_p, POINTER(Bgt60ltr11Config)]
+        self.ltr11_get_firmware_version = lib.ltr11_get_firmware_version
+        self.ltr11_get_firmware_version.restype = c_bool
+        self.ltr11_get_firmware_version.argtypes = [c_void_p, POINTER(
+            c_uint16), POINTER(c_uint16), POINTER(c_uint16)]
 
-c_ltr11_get_firmware_version = libltr.ltr11_get_firmware_version
-c_ltr11_get_firmware_version.restype = c_bool
-c_ltr11_get_firmware_version.argtypes = [c_void_p, POINTER(
-    c_uint16), POINTER(c_uint16), POINTER(c_uint16)]
+        self.ltr11_get_device_info = lib.ltr11_get_device_info
+        self.ltr11_get_device_info.restype = c_bool
+        self.ltr11_get_device_info.argtypes = [c_void_p, POINTER(BGT60ltr11DeviceInfo)]
 
-c_ltr11_get_device_info = libltr.ltr11_get_device_info
-c_ltr11_get_device_info.restype = c_bool
-c_ltr11_get_device_info.argtypes = [c_void_p, POINTER(BGT60ltr11DeviceInfo)]
+
+_default_library = None
+
+
+def _get_default_library():
+    # the library is loaded on first use, so that importing this module works
+    # on hosts without the library when another backend is used
+    global _default_library
+    if _default_library is None:
+        _default_library = BGT60LTR11Library()
+    return _default_library
 
 
 class BGT60LTR11:
     """Python wrapper for BGT60LTR11AIP"""
 
+    # Waiting for samples: by default the time to sleep is derived from the
+    # sampling frequency and the number of samples requested. If
+    # poll_interval is set to a number of seconds, the FIFO is polled with
+    # this fixed interval instead.
+    poll_interval = None
+    min_poll_interval = 0.001
+
     @staticmethod
-    def get_list():
+    def get_list(backend=None):
         """Get a list of available devices.
 
         Each element of the list can be given as argument port in the
@@ -247,6 +299,12 @@ class BGT60LTR11:
         Note that only devices are found which are not yet opened. A device
         which is currently opened will not be found by this method.
 
+        Parameters
+        ----------
+        backend: object
+            Backend to query, see ``BGT60LTR11``. Defaults to the ltr11
+            library.
+
         Returns
         -------
         port_list: list
@@ -263,10 +321,12 @@ class BGT60LTR11:
         """
         size = 2048
         buf = create_string_buffer(size)
-        c_ltr11_get_list(buf, size)
+        if backend is None:
+            backend = _get_default_library()
+        backend.ltr11_get_list(buf, size)
         return buf.value.decode("ascii").split(";")
 
-    def __init__(self, port=None):
+    def __init__(self, port=None, backend=None):
         """Open connection to a BGT60LTR11AIP device.
 
         The constructor opens the specific port. If port is not given (or
@@ -289,12 +349,21 @@ class BGT60LTR11:
 
         Note that the library is not thread-safe. Do not use this library from
         different threads.
+
+        By default the device is accessed through the ltr11 library
+        (``BGT60LTR11Library``). Any object providing the same ``ltr11_*``
+        functions can be given as `backend` instead, e.g. the simulated
+        device from ``ltr11_sim``:
+
+            with BGT60LTR11(backend=BGT60LTR11Simulator()) as ltr11:
+                # use simulated device
         """
+        self._lib = backend if backend is not None else _get_default_library()
         if port:
             port_bytes = port.encode("ascii")
-            self.handle = c_ltr11_open(c_char_p(port_bytes))
+            self.handle = self._lib.ltr11_open(c_char_p(port_bytes))
         else:
-            self.handle = c_ltr11_open(None)
+            self.handle = self._lib.ltr11_open(None)
         if not self.handle:
             raise BGT60LTR11Error("Cannot open device")
 
@@ -304,6 +373,10 @@ class BGT60LTR11:
             raise BGT60LTR11Error(
                 f"Need at least firmware version 1.1.5; actual version is {version}")
 
+        self._sampling_frequency = self._config_sampling_frequency(
+            self.get_configuration())
+        self._read_until = time.monotonic()
+
     def get_firmware_version(self):
         """Get firmware version.
 
@@ -313,7 +386,7 @@ class BGT60LTR11:
             tuple consisting of the major, minor, and build version.
         """
         major, minor, build = c_uint16(0), c_uint16(0), c_uint16(0)
-        if not c_ltr11_get_firmware_version(self.handle, byref(major), byref(minor), byref(build)):
+        if not self._lib.ltr11_get_firmware_version(self.handle, byref(major), byref(minor), byref(build)):
             raise BGT60LTR11Error("Could not get firmware version")
 
         return major.value, minor.value, build.value
@@ -327,7 +400,7 @@ class BGT60LTR11:
             Device Information.
         """
         device_info = BGT60ltr11DeviceInfo()
-        if not c_ltr11_get_device_info(self.handle, byref(device_info)):
+        if not self._lib.ltr11_get_device_info(self.handle, byref(device_info)):
             raise BGT60LTR11Error("Could not get device information")
 
         d = {}
@@ -377,7 +450,7 @@ class BGT60LTR11:
             Value of the register read.
         """
         v = c_uint16(0)
-        if not c_ltr11_read_register(self.handle, c_uint8(addr), pointer(v)):
+        if not self._lib.ltr11_read_register(self.handle, c_uint8(addr), pointer(v)):
             raise BGT60LTR11Error("Could not read register")
         return v.value
 
@@ -393,7 +466,7 @@ class BGT60LTR11:
         value: int
             value to be written to this register
         """
-        if not c_ltr11_write_register(self.handle, c_uint8(addr), c_uint16(value)):
+        if not self._lib.ltr11_write_register(self.handle, c_uint8(addr), c_uint16(value)):
             raise BGT60LTR11Error("Could not write register")
 
     def get_detection(self):
@@ -410,7 +483,7 @@ class BGT60LTR11:
         """
         gpio1 = c_bool(False)
         gpio2 = c_bool(False)
-        if not c_ltr11_get_detection(self.handle, pointer(gpio1), pointer(gpio2)):
+        if not self._lib.ltr11_get_detection(self.handle, pointer(gpio1), pointer(gpio2)):
             raise BGT60LTR11Error("Could not read detection state")
 
         detection = gpio1.value
@@ -423,20 +496,21 @@ class BGT60LTR11:
 
     def start_data_acquisition(self):
         """Start data acquisition."""
-        if not c_ltr11_start_data_acquisition(self.handle):
+        if not self._lib.ltr11_start_data_acquisition(self.handle):
             raise BGT60LTR11Error("Could not start data acquisition")
+        self._read_until = time.monotonic()
 
     def stop_data_acquisition(self):
         """Stop data acquisition."""
-        if not c_ltr11_stop_data_acquisition(self.handle):
+        if not self._lib.ltr11_stop_data_acquisition(self.handle):
             raise BGT60LTR11Error("Could not stop data acquisition")
 
     def soft_reset(self):
         """Perform a soft-reset."""
-        if not c_ltr11_soft_reset(self.handle):
+        if not self._lib.ltr11_soft_reset(self.handle):
             raise BGT60LTR11Error("Could not perform soft-reset")
 
-    def get_raw_data(self, num_samples=None):
+    def get_raw_data(self, num_samples=None, copy=False, timeout=None):
         """Fetch raw data from BGT60LTR11AIP.
 
         This is a more low-level version of ``get_data``. If you are only
@@ -460,6 +534,12 @@ class BGT60LTR11:
         The signal is between 0 and 1, the average of the signal is
         approximately at 0.5.
 
+        By default data is a read-only view of the sample buffer owned by the
+        library; no samples are copied. The buffer is reused by the library,
+        so the view is only valid until the next call of ``get_raw_data`` or
+        ``get_data``. Pass ``copy=True`` if the samples must outlive the next
+        call.
+
         Parameters
         ----------
         num_samples: int
@@ -471,6 +551,15 @@ class BGT60LTR11:
             FIFO overflows. If you need more than 2048 samples it is
             recommended to call this method multiple times.
 
+        copy: bool
+            If True, data is a copy owned by the caller instead of a view of
+            the library buffer.
+
+        timeout: float
+            Maximum time in seconds to wait for samples. If no samples are
+            available in time a ``BGT60LTR11TimeoutError`` is raised. If
+            `timeout` is `None` the method waits until samples arrive.
+
         Returns
         -------
         overflow: bool
@@ -485,20 +574,75 @@ class BGT60LTR11:
             min_samples = 0
             max_samples = 4096
 
+        deadline = None if timeout is None else time.monotonic() + timeout
         while True:
             data = POINTER(c_double)()
             overflow = c_bool(False)
             nsamples = c_size_t(0)
-            if not c_ltr11_get_raw_data(self.handle, byref(data), byref(nsamples), byref(overflow), min_samples, max_samples):
+            if not self._lib.ltr11_get_raw_data(self.handle, byref(data), byref(nsamples), byref(overflow), min_samples, max_samples):
                 raise BGT60LTR11Error("Could not get raw data")
 
             if nsamples.value > 0:
-                return overflow.value, np.array([data[i] for i in range(2*nsamples.value)])
+                self._track_fifo(nsamples.value, overflow.value)
+                # wrap the library buffer without touching the samples
+                raw_data = np.ctypeslib.as_array(data, shape=(2*nsamples.value,))
+                if copy:
+                    return overflow.value, raw_data.copy()
+                raw_data.flags.writeable = False
+                return overflow.value, raw_data
+
+            # sleep until the FIFO should hold enough samples, then check again
+            now = time.monotonic()
+            delay = self._poll_delay(min_samples, now)
+            if deadline is not None:
+                if now >= deadline:
+                    raise BGT60LTR11TimeoutError(
+                        f"No samples available within {timeout}s")
+                delay = min(delay, deadline - now)
+            time.sleep(delay)
+
+    def _track_fifo(self, num_samples, overflow):
+        """Advance the estimated time at which the last sample read was taken."""
+        now = time.monotonic()
+        if overflow:
+            # the FIFO was full, only the most recent samples were kept
+            self._read_until = now
+        else:
+            self._read_until = min(
+                self._read_until + num_samples / self._sampling_frequency, now)
+
+    def _poll_delay(self, num_samples, now):
+        """Time to sleep before polling the FIFO again."""
+        if self.poll_interval is not None:
+            return self.poll_interval
+
+        # wait until the missing samples should have been taken; if that
+        # estimate was too optimistic, poll again after one sample period
+        period = 1 / self._sampling_frequency
+        ready = self._read_until + max(num_samples, 1) * period
+        return max(ready - now, period, self.min_poll_interval)
+
+    def get_sampling_frequency(self):
+        """Get the sampling frequency of the current configuration.
+
+        In pulse mode the sampling frequency is given by the pulse repetition
+        time.
+
+        Returns
+        -------
+        sampling_frequency: float
+            Sampling frequency in Hz.
+        """
+        return self._sampling_frequency
 
-            # sleep 20ms and then check again for new data
-            time.sleep(0.02)
+    @staticmethod
+    def _config_sampling_frequency(config):
+        if config["mode"] == 1:
+            # pulse mode: one sample per pulse repetition (250us << index)
+            return 1e6 / (250 << config["pulse_repetition"])
+        return config["sampling_frequency"]
 
-    def get_data(self, num_samples):
+    def get_data(self, num_samples, out=None, ifi=None, ifq=None, timeout=None):
         """Fetch IFI and IFQ data from BGT60LTR11AIP.
 
         Make sure to call ``start_data_acquisition`` first.
@@ -516,11 +660,46 @@ class BGT60LTR11:
         The IFI and IFQ data is between 0 and 1, the average of the signal is
         approximately at 0.5.
 
+        By default new arrays are allocated on every call. To avoid any
+        allocation in a capture loop, preallocate the destination once and
+        pass it on every call, either as a single interleaved buffer
+
+            buf = np.empty(2*num_samples)
+            while True:
+                ifi, ifq = device.get_data(num_samples, out=buf)
+
+        or as a pair of arrays
+
+            ifi, ifq = np.empty(num_samples), np.empty(num_samples)
+            while True:
+                device.get_data(num_samples, ifi=ifi, ifq=ifq)
+
+        The samples are written chunk by chunk directly into the destination.
+
         Parameters
         ----------
         num_samples: int
             Number of samples to fetch from the BGT60LTR11.
 
+        out: np.ndarray
+            Optional one-dimensional float64 array of length
+            2*`num_samples`. It is filled with interleaved I/Q data in the
+            layout of ``get_raw_data`` and the returned ifi and ifq are
+            strided views of it. Cannot be combined with `ifi` and `ifq`.
+
+        ifi: np.ndarray
+            Optional one-dimensional float64 array of length `num_samples`
+            receiving the IFI data. Must be given together with `ifq`.
+
+        ifq: np.ndarray
+            Optional one-dimensional float64 array of length `num_samples`
+            receiving the IFQ data. Must be given together with `ifi`.
+
+        timeout: float
+            Maximum time in seconds for fetching all samples. If it expires
+            a ``BGT60LTR11TimeoutError`` is raised. If `timeout` is `None` the
+            method waits until all samples arrived.
+
         Returns
         -------
         ifi: np.array
@@ -529,19 +708,42 @@ class BGT60LTR11:
         ifq: np.array
             IFQ data of length `num_samples`.
         """
-        raw_data = np.array([])
-        while num_samples > 0:
-            n = min(1024, num_samples)
-            overflow, data = self.get_raw_data(n)
+        if out is not None:
+            if ifi is not None or ifq is not None:
+                raise ValueError("out cannot be combined with ifi and ifq")
+            if out.shape != (2*num_samples,):
+                raise ValueError(
+                    f"out must have shape ({2*num_samples},), got {out.shape}")
+            ifq = out[::2]  # Q signal
+            ifi = out[1::2]  # I signal
+        elif ifi is None and ifq is None:
+            out = np.empty(2*num_samples)
+            ifq = out[::2]  # Q signal
+            ifi = out[1::2]  # I signal
+        elif ifi is None or ifq is None:
+            raise ValueError("ifi and ifq must be given together")
+        elif ifi.shape != (num_samples,) or ifq.shape != (num_samples,):
+            raise ValueError(
+                f"ifi and ifq must have shape ({num_samples},)")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pos = 0
+        while pos < num_samples:
+            n = min(1024, num_samples - pos)
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            overflow, data = self.get_raw_data(n, timeout=timeout)
             if overflow:
                 raise BGT60LTR11FIFOError("FIFO overflow")
 
-            # concat vectors
-            raw_data = np.hstack([raw_data, data])
-            num_samples -= n
-
-        ifq = raw_data[::2]  # Q signal
-        ifi = raw_data[1::2]  # I signal
+            # deinterleave straight into the destination
+            n = len(data) // 2
+            if out is not None:
+                out[2*pos:2*(pos+n)] = data
+            else:
+                ifq[pos:pos+n] = data[::2]
+                ifi[pos:pos+n] = data[1::2]
+            pos += n
 
         return ifi, ifq
 
@@ -554,7 +756,7 @@ class BGT60LTR11:
             Device configuration.
         """
         config = Bgt60ltr11Config()
-        if not c_ltr11_get_configuration(self.handle, byref(config)):
+        if not self._lib.ltr11_get_configuration(self.handle, byref(config)):
             raise BGT60LTR11Error("Could not get configuration")
 
         d = {}
@@ -723,8 +925,10 @@ class BGT60LTR11:
                              sampling_frequency,
                              rf_center_freq)
 
-        if not c_ltr11_set_configuration(self.handle, byref(c)):
+        if not self._lib.ltr11_set_configuration(self.handle, byref(c)):
             raise BGT60LTR11Error("Could not set configuration")
+        self._sampling_frequency = self._config_sampling_frequency(
+            self.get_configuration())
 
     def __enter__(self):
         return self
@@ -735,5 +939,5 @@ class BGT60LTR11:
     def __del__(self):
         """Destroy device handle"""
         if hasattr(self, "handle") and self.handle:
-            c_ltr11_close(self.handle)
+            self._lib.ltr11_close(self.handle)
             self.handle = None
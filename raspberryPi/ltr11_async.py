@@ -0,0 +1,194 @@
+"""
+asyncio front-end for BGT60LTR11AIP
+
+Overview
+--------
+
+The methods of ``BGT60LTR11`` block until the RadarBaseboardMCU7 answers and
+the library is not thread-safe. ``AsyncBGT60LTR11`` runs every library call on
+one dedicated worker thread and exposes them as coroutines, so the radar can
+share an event loop with other I/O:
+
+    async def main():
+        async with AsyncBGT60LTR11() as ltr11:
+            await ltr11.set_configuration(sampling_frequency=2000)
+            async with aclosing(ltr11.blocks(512)) as blocks:
+                async for ifi, ifq in blocks:
+                    # process ifi, ifq
+
+    asyncio.run(main())
+
+``contextlib.aclosing`` stops the acquisition as soon as the loop is left,
+e.g. with break; otherwise it keeps running until the generator is garbage
+collected or the next ``blocks`` restarts it.
+
+All calls are executed one after another on the worker thread, in the order
+they were awaited.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from ltr11 import BGT60LTR11, BGT60LTR11Error
+
+__all__ = ["AsyncBGT60LTR11"]
+
+
+class AsyncBGT60LTR11:
+    """asyncio wrapper for ``BGT60LTR11``"""
+
+    def __init__(self, *args, **kwargs):
+        """Prepare an asynchronous connection to a BGT60LTR11AIP device.
+
+        The arguments are passed to ``BGT60LTR11`` when the device is opened
+        by ``open`` or by entering the asynchronous context manager:
+
+            async with AsyncBGT60LTR11(port=port) as ltr11:
+                # use ltr11 device
+        """
+        self._args = args
+        self._kwargs = kwargs
+        self._executor = None
+        self._device = None
+        self._acquiring = False
+        # incremented by every start, so that a stale ``blocks`` generator
+        # can tell that the acquisition it started is gone
+        self._acquisition = 0
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _device_call(self, name, *args, **kwargs):
+        if self._device is None:
+            raise BGT60LTR11Error("Device is not open")
+        return await self._call(getattr(self._device, name), *args, **kwargs)
+
+    async def open(self):
+        """Open the device on a new worker thread."""
+        if self._device is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="BGT60LTR11")
+        try:
+            self._device = await self._call(
+                BGT60LTR11, *self._args, **self._kwargs)
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise
+
+    async def close(self):
+        """Close the device and stop the worker thread."""
+        if self._device is None:
+            return
+        try:
+            if self._acquiring:
+                await self.stop_data_acquisition()
+            await self._call(self._device.__exit__, None, None, None)
+        finally:
+            self._device = None
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def get_firmware_version(self):
+        """See ``BGT60LTR11.get_firmware_version``."""
+        return await self._device_call("get_firmware_version")
+
+    async def get_device_info(self):
+        """See ``BGT60LTR11.get_device_info``."""
+        return await self._device_call("get_device_info")
+
+    async def read_register(self, addr):
+        """See ``BGT60LTR11.read_register``."""
+        return await self._device_call("read_register", addr)
+
+    async def write_register(self, addr, value):
+        """See ``BGT60LTR11.write_register``."""
+        await self._device_call("write_register", addr, value)
+
+    async def get_detection(self):
+        """See ``BGT60LTR11.get_detection``."""
+        return await self._device_call("get_detection")
+
+    async def start_data_acquisition(self):
+        """See ``BGT60LTR11.start_data_acquisition``."""
+        await self._device_call("start_data_acquisition")
+        self._acquiring = True
+        self._acquisition += 1
+
+    async def stop_data_acquisition(self):
+        """See ``BGT60LTR11.stop_data_acquisition``."""
+        self._acquiring = False
+        await self._device_call("stop_data_acquisition")
+
+    async def soft_reset(self):
+        """See ``BGT60LTR11.soft_reset``."""
+        await self._device_call("soft_reset")
+
+    async def get_raw_data(self, num_samples=None, timeout=None):
+        """See ``BGT60LTR11.get_raw_data``.
+
+        The data is always copied, as the library buffer may be reused by the
+        next call before the caller gets to it.
+        """
+        return await self._device_call(
+            "get_raw_data", num_samples, copy=True, timeout=timeout)
+
+    async def get_data(self, num_samples, timeout=None):
+        """See ``BGT60LTR11.get_data``."""
+        return await self._device_call(
+            "get_data", num_samples, timeout=timeout)
+
+    async def get_configuration(self):
+        """See ``BGT60LTR11.get_configuration``."""
+        return await self._device_call("get_configuration")
+
+    async def set_configuration(self, **kwargs):
+        """See ``BGT60LTR11.set_configuration``."""
+        await self._device_call("set_configuration", **kwargs)
+
+    async def get_sampling_frequency(self):
+        """See ``BGT60LTR11.get_sampling_frequency``."""
+        return await self._device_call("get_sampling_frequency")
+
+    async def blocks(self, num_samples, timeout=None):
+        """Asynchronously iterate over blocks of IFI and IFQ data.
+
+        Data acquisition is started when the iteration begins and stopped
+        when the iterator or the device is closed; wrap the iterator in
+        ``contextlib.aclosing`` to stop it when the loop is left early. An
+        acquisition still running from an earlier iterator is restarted.
+        Each item is the tuple (ifi, ifq) returned by ``get_data``; a FIFO
+        overflow raises ``BGT60LTR11FIFOError``.
+
+        Parameters
+        ----------
+        num_samples: int
+            Number of samples per block.
+
+        timeout: float
+            Maximum time in seconds to wait for a block, see ``get_data``.
+        """
+        if self._acquiring:
+            # left by an earlier iterator without closing it
+            await self.stop_data_acquisition()
+        await self.start_data_acquisition()
+        acquisition = self._acquisition
+        try:
+            while True:
+                yield await self.get_data(num_samples, timeout=timeout)
+        finally:
+            # an iterator left with break is only finalized later, when the
+            # device may already acquire for a newer one
+            if self._acquiring and self._acquisition == acquisition:
+                await self.stop_data_acquisition()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,338 @@
+"""
+Recording and replay of BGT60LTR11AIP sessions
+
+Overview
+--------
+
+``BGT60LTR11Recorder`` wraps an opened ``BGT60LTR11`` and appends everything
+that goes through it to a file: I/Q blocks with their FIFO overflow flag,
+detection states, data acquisition start/stop and every configuration that
+becomes active. The wrapper is used exactly like the device:
+
+    with BGT60LTR11() as ltr11, BGT60LTR11Recorder(ltr11, "capture.ltr11") as rec:
+        rec.set_configuration(sampling_frequency=2000)
+        rec.start_data_acquisition()
+        ifi, ifq = rec.get_data(512)
+
+``BGT60LTR11Replay`` is a backend for ``BGT60LTR11`` that serves a recording
+back through the unchanged wrapper, either paced like the original session
+or as fast as the samples are fetched:
+
+    with BGT60LTR11(backend=BGT60LTR11Replay("capture.ltr11")) as ltr11:
+        ltr11.start_data_acquisition()
+        ifi, ifq = ltr11.get_data(512)
+
+File format
+-----------
+
+All values are little-endian. The file starts with the 8 byte magic
+``LTR11REC`` followed by a sequence of chunks. Each chunk has a 24 byte header
+
+    kind       4 bytes   b"CONF", b"STRT", b"STOP", b"DATA" or b"DETE"
+    flags      uint32    DATA: bit 0 FIFO overflow
+                         DETE: bit 0 motion, bit 1 departing
+    timestamp  float64   seconds since the recording was started
+    size       uint64    payload size in bytes
+
+followed by the payload, padded to a multiple of 8 bytes. CONF carries a UTF-8
+JSON object with the ``configuration`` (see ``get_configuration``); the first
+one also holds the ``firmware_version`` and the wall clock ``start_time``.
+DATA carries float32 interleaved I/Q samples starting with Q, as returned by
+``get_raw_data``. As every payload is aligned, ``BGT60LTR11Recording`` maps
+the file into memory and returns the samples without reading or copying the
+whole file.
+"""
+
+import ctypes
+import json
+import struct
+import time
+from collections import namedtuple
+import numpy as np
+
+from ltr11 import BGT60LTR11FIFOError, deref
+from ltr11_sim import BGT60LTR11Simulator
+
+__all__ = ["BGT60LTR11Recorder", "BGT60LTR11Recording", "BGT60LTR11Replay",
+           "RecordingChunk"]
+
+MAGIC = b"LTR11REC"
+_HEADER = struct.Struct("<4sIdQ")
+
+OVERFLOW = 1
+MOTION = 1
+DEPART = 2
+
+RecordingChunk = namedtuple(
+    "RecordingChunk", ["kind", "flags", "timestamp", "offset", "size"])
+RecordingChunk.__doc__ = '''\
+Chunk of a recording
+
+Members:
+- ``kind``: chunk type, one of b"CONF", b"STRT", b"STOP", b"DATA", b"DETE"
+- ``flags``: chunk flags
+- ``timestamp``: seconds since the recording was started
+- ``offset``: file offset of the payload
+- ``size``: payload size in bytes'''
+
+
+class BGT60LTR11Recorder:
+    """Record everything passing through a ``BGT60LTR11`` to a file."""
+
+    def __init__(self, device, path):
+        """Start recording `device` to the file `path`.
+
+        The current configuration and the firmware version are written
+        immediately. Methods not recorded are passed through to `device`.
+        """
+        self.device = device
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._start = time.monotonic()
+        self._write_configuration(
+            firmware_version=list(device.get_firmware_version()),
+            start_time=time.time())
+
+    def _write(self, kind, flags=0, payload=b""):
+        timestamp = time.monotonic() - self._start
+        padding = -len(payload) % 8
+        self._file.write(_HEADER.pack(kind, flags, timestamp, len(payload)))
+        self._file.write(payload)
+        self._file.write(b"\0" * padding)
+
+    def _write_configuration(self, **extra):
+        conf = dict(configuration=self.device.get_configuration(), **extra)
+        self._write(b"CONF", payload=json.dumps(conf).encode("utf-8"))
+
+    def _write_data(self, raw_data, overflow):
+        data = np.asarray(raw_data, dtype="<f4")
+        self._write(b"DATA", OVERFLOW if overflow else 0, data.tobytes())
+
+    def set_configuration(self, **kwargs):
+        """See ``BGT60LTR11.set_configuration``."""
+        self.device.set_configuration(**kwargs)
+        self._write_configuration()
+
+    def start_data_acquisition(self):
+        """See ``BGT60LTR11.start_data_acquisition``."""
+        self.device.start_data_acquisition()
+        self._write(b"STRT")
+
+    def stop_data_acquisition(self):
+        """See ``BGT60LTR11.stop_data_acquisition``."""
+        self.device.stop_data_acquisition()
+        self._write(b"STOP")
+
+    def get_detection(self):
+        """See ``BGT60LTR11.get_detection``."""
+        detection = self.device.get_detection()
+        flags = (MOTION if detection.motion else 0) | \
+            (DEPART if detection.direction == "depart" else 0)
+        self._write(b"DETE", flags)
+        return detection
+
+    def get_raw_data(self, num_samples=None, copy=False, timeout=None):
+        """See ``BGT60LTR11.get_raw_data``."""
+        overflow, data = self.device.get_raw_data(num_samples, copy, timeout)
+        self._write_data(data, overflow)
+        return overflow, data
+
+    def get_data(self, num_samples, out=None, ifi=None, ifq=None, timeout=None):
+        """See ``BGT60LTR11.get_data``.
+
+        A FIFO overflow is recorded as an empty block with the overflow flag
+        set.
+        """
+        try:
+            ifi, ifq = self.device.get_data(num_samples, out, ifi, ifq, timeout)
+        except BGT60LTR11FIFOError:
+            self._write_data((), True)
+            raise
+        raw_data = np.empty(2*num_samples, dtype="<f4")
+        raw_data[::2] = ifq
+        raw_data[1::2] = ifi
+        self._write(b"DATA", 0, raw_data.tobytes())
+        return ifi, ifq
+
+    def __getattr__(self, name):
+        return getattr(self.device, name)
+
+    def close(self):
+        """Close the recording. The device stays open."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class BGT60LTR11Recording:
+    """Read-only, memory-mapped view of a recording."""
+
+    def __init__(self, path):
+        """Map the recording `path` and index its chunks."""
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._map[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a BGT60LTR11 recording")
+
+        self.chunks = []
+        offset = len(MAGIC)
+        while offset + _HEADER.size <= len(self._map):
+            kind, flags, timestamp, size = _HEADER.unpack_from(self._map, offset)
+            offset += _HEADER.size
+            if offset + size > len(self._map):
+                break  # truncated by a crash while recording
+            self.chunks.append(
+                RecordingChunk(kind, flags, timestamp, offset, size))
+            offset += size + -size % 8
+
+    def configuration(self, chunk):
+        """Decoded JSON object of a CONF chunk."""
+        payload = self._map[chunk.offset:chunk.offset + chunk.size]
+        return json.loads(bytes(payload).decode("utf-8"))
+
+    def data(self, chunk):
+        """Interleaved I/Q samples of a DATA chunk as a float32 view."""
+        payload = self._map[chunk.offset:chunk.offset + chunk.size]
+        return payload.view("<f4")
+
+
+class BGT60LTR11Replay(BGT60LTR11Simulator):
+    """Backend for ``BGT60LTR11`` serving a recording"""
+
+    port = "REPLAY0"
+
+    def __init__(self, path, realtime=True, clock=time.monotonic):
+        """Replay the recording `path`.
+
+        Parameters
+        ----------
+        path: str
+            File written by ``BGT60LTR11Recorder``.
+
+        realtime: bool
+            If True, each I/Q block becomes available at the same time
+            relative to the first block as during the recording. If False,
+            all blocks are available immediately.
+
+        clock: callable
+            Monotonic clock in seconds.
+
+        All I/Q blocks are served as one continuous stream, regardless of
+        how often data acquisition was stopped and started while recording.
+        After the last block no more samples become available. Detection
+        states and the configuration follow the replay position. Writes to
+        the configuration and registers are accepted but do not change the
+        replayed data.
+        """
+        self.recording = BGT60LTR11Recording(path)
+        chunks = self.recording.chunks
+        self._data_chunks = [c for c in chunks if c.kind == b"DATA"]
+        self._configurations = [
+            (c.timestamp, self.recording.configuration(c))
+            for c in chunks if c.kind == b"CONF"]
+        self._detections = [c for c in chunks if c.kind == b"DETE"]
+        if not self._configurations:
+            raise ValueError(f"{path} contains no configuration")
+
+        first = self._configurations[0][1]
+        self.firmware_version = tuple(
+            first.get("firmware_version", self.firmware_version))
+        fifo_size = max((c.size // 8 for c in self._data_chunks), default=1)
+        super().__init__(fifo_size=max(fifo_size, 4096), realtime=realtime,
+                         clock=clock)
+
+    def _replay_time(self):
+        """Recording time corresponding to the current replay position."""
+        if not self._data_chunks:
+            return 0
+        if self.realtime and self._acquiring:
+            return self._time_offset + self.clock() - self._start_time
+        index = min(max(self._chunk - 1, 0), len(self._data_chunks) - 1)
+        return self._data_chunks[index].timestamp
+
+    @property
+    def finished(self):
+        """True if all recorded samples were served."""
+        return self._chunk >= len(self._data_chunks)
+
+    def ltr11_soft_reset(self, handle):
+        super().ltr11_soft_reset(handle)
+        self._chunk = 0
+        self._chunk_pos = 0
+        return True
+
+    def ltr11_start_data_acquisition(self, handle):
+        super().ltr11_start_data_acquisition(handle)
+        # continue pacing from the next block to be served
+        index = min(self._chunk, len(self._data_chunks) - 1)
+        self._time_offset = self._data_chunks[index].timestamp \
+            if self._data_chunks else 0
+        return True
+
+    def ltr11_get_configuration(self, handle, config):
+        now = self._replay_time()
+        active = self._configurations[0][1]
+        for timestamp, conf in self._configurations:
+            if timestamp > now:
+                break
+            active = conf
+        self._config = dict(active["configuration"])
+        return super().ltr11_get_configuration(handle, config)
+
+    def ltr11_get_detection(self, handle, gpio1, gpio2):
+        now = self._replay_time()
+        flags = 0
+        for chunk in self._detections:
+            if chunk.timestamp > now:
+                break
+            flags = chunk.flags
+        deref(gpio1).value = bool(flags & MOTION)
+        deref(gpio2).value = bool(flags & DEPART)
+        return True
+
+    def ltr11_get_raw_data(self, handle, data, nsamples, overflow,
+                           min_samples, max_samples):
+        if not self._acquiring:
+            return False
+
+        # blocks that are due, and the samples still unread in them
+        if self.realtime:
+            now = self._replay_time()
+            due = self._chunk
+            while due < len(self._data_chunks) and \
+                    self._data_chunks[due].timestamp <= now:
+                due += 1
+        else:
+            due = len(self._data_chunks)
+        available = sum(c.size // 8 for c in self._data_chunks[self._chunk:due])
+        available -= self._chunk_pos
+        if available < max(min_samples, 1):
+            deref(nsamples).value = 0
+            return True
+
+        n = min(available, max_samples, self.fifo_size)
+        out = np.ctypeslib.as_array(self._buffer)
+        pos = 0
+        flag = False
+        while pos < n:
+            chunk = self._data_chunks[self._chunk]
+            if self._chunk_pos == 0:
+                flag |= bool(chunk.flags & OVERFLOW)
+            samples = self.recording.data(chunk)
+            take = min(n - pos, len(samples) // 2 - self._chunk_pos)
+            out[2*pos:2*(pos+take)] = \
+                samples[2*self._chunk_pos:2*(self._chunk_pos+take)]
+            pos += take
+            self._chunk_pos += take
+            if self._chunk_pos == len(samples) // 2:
+                self._chunk += 1
+                self._chunk_pos = 0
+
+        deref(data).contents = ctypes.c_double.from_buffer(self._buffer)
+        deref(nsamples).value = n
+        deref(overflow).value = flag
+        return True
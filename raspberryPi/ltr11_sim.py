@@ -0,0 +1,259 @@
+"""
+Simulated BGT60LTR11AIP
+
+Overview
+--------
+
+``BGT60LTR11Simulator`` is a backend for ``BGT60LTR11`` which needs neither
+the ltr11 library nor a RadarBaseboardMCU7. It provides the ``ltr11_*``
+functions of ``BGT60LTR11Library`` with the same ctypes arguments, so the
+complete wrapper runs unchanged on top of it:
+
+    sim = BGT60LTR11Simulator(targets=[DopplerTarget(frequency=120)],
+                              noise=0.01, seed=0)
+    with BGT60LTR11(backend=sim) as ltr11:
+        ltr11.set_configuration(sampling_frequency=2000)
+        ltr11.start_data_acquisition()
+        ifi, ifq = ltr11.get_data(512)
+
+The simulated device produces samples at the configured sampling frequency
+into a FIFO of ``fifo_size`` samples. Samples not fetched in time are
+discarded and the next read reports a FIFO overflow, like on the real
+hardware. With ``realtime=False`` the FIFO is always full and samples are
+produced as fast as they are fetched. The clock can be replaced to step time
+deterministically.
+
+The I/Q signal is the sum of the Doppler targets plus white Gaussian noise
+around 0.5, clipped to [0, 1]. Approaching targets have positive, departing
+targets negative Doppler frequencies. The detection GPIOs report motion while
+at least one target is active and the direction of the strongest one.
+"""
+
+import ctypes
+import math
+import time
+from collections import namedtuple
+import numpy as np
+
+from ltr11 import BGT60LTR11, deref
+
+__all__ = ["DopplerTarget", "BGT60LTR11Simulator"]
+
+
+DopplerTarget = namedtuple(
+    "DopplerTarget", ["frequency", "amplitude", "phase", "start", "stop"],
+    defaults=[0.1, 0.0, 0.0, math.inf])
+DopplerTarget.__doc__ = '''\
+Moving target seen by the simulated BGT60LTR11AIP
+
+Members:
+- ``frequency``: Doppler frequency in Hz; positive if approaching
+- ``amplitude``: amplitude of the target in the I/Q signal (default 0.1)
+- ``phase``: phase at time 0 in radians (default 0)
+- ``start``: time in seconds after the start of data acquisition at which the
+  target appears (default 0)
+- ``stop``: time in seconds at which the target disappears (default never)'''
+
+
+class BGT60LTR11Simulator:
+    """Pure Python backend emulating a BGT60LTR11AIP on a RadarBaseboardMCU7"""
+
+    port = "SIM0"
+    firmware_version = (1, 1, 7)
+
+    def __init__(self, targets=(), noise=0.01, fifo_size=4096, realtime=True,
+                 clock=time.monotonic, seed=None):
+        """Create a simulated device.
+
+        Parameters
+        ----------
+        targets: list
+            ``DopplerTarget`` elements present in the scene.
+
+        noise: float
+            Standard deviation of the noise on IFI and IFQ.
+
+        fifo_size: int
+            Number of samples the FIFO of the RadarBaseboardMCU7 holds.
+
+        realtime: bool
+            If True, samples are produced at the sampling frequency. If False,
+            any number of samples is available immediately and the FIFO never
+            overflows.
+
+        clock: callable
+            Monotonic clock in seconds.
+
+        seed: int
+            Seed of the noise generator.
+        """
+        self.targets = list(targets)
+        self.noise = noise
+        self.fifo_size = fifo_size
+        self.realtime = realtime
+        self.clock = clock
+        self._rng = np.random.default_rng(seed)
+        self._open = False
+        self._acquiring = False
+        # never reallocated, no read returns more than fifo_size samples
+        self._buffer = (ctypes.c_double * (2*fifo_size))()
+        self.ltr11_soft_reset(None)
+
+    # --- state -------------------------------------------------------------
+
+    @property
+    def sampling_frequency(self):
+        """Effective sampling frequency in Hz."""
+        return BGT60LTR11._config_sampling_frequency(self._config)
+
+    def _produced(self):
+        """Number of samples produced since data acquisition was started."""
+        if not self._acquiring:
+            return self._consumed
+        if not self.realtime:
+            return self._consumed + self.fifo_size
+        elapsed = self.clock() - self._start_time
+        return int(elapsed * self.sampling_frequency)
+
+    def _active_targets(self, t):
+        return [target for target in self.targets
+                if target.start <= t < target.stop]
+
+    def _synthesize(self, first, n):
+        """Interleaved Q/I samples with index first ... first+n-1."""
+        t = (first + np.arange(n)) / self.sampling_frequency
+        signal = np.zeros(n, dtype=complex)
+        for target in self.targets:
+            active = (target.start <= t) & (t < target.stop)
+            signal += active * target.amplitude * np.exp(
+                1j * (2*np.pi*target.frequency*t + target.phase))
+        if self.noise:
+            signal += self.noise * (self._rng.standard_normal(n) +
+                                    1j*self._rng.standard_normal(n))
+
+        data = np.ctypeslib.as_array(self._buffer)[:2*n]
+        np.clip(0.5 + signal.imag, 0, 1, out=data[::2])  # Q signal
+        np.clip(0.5 + signal.real, 0, 1, out=data[1::2])  # I signal
+
+    # --- ltr11 library functions ------------------------------------------
+
+    def ltr11_get_list(self, buf, size):
+        ports = b"" if self._open else self.port.encode("ascii")
+        ctypes.memmove(buf, ports, min(len(ports), size - 1))
+        return 0
+
+    def ltr11_open(self, port):
+        if self._open:
+            return None
+        if port is not None:
+            port = port.value if isinstance(port, ctypes.c_char_p) else port
+            if port.decode("ascii") != self.port:
+                return None
+        self._open = True
+        return 1
+
+    def ltr11_close(self, handle):
+        self._open = False
+        self._acquiring = False
+
+    def ltr11_read_register(self, handle, addr, value):
+        deref(value).value = self._registers.get(addr.value, 0)
+        return True
+
+    def ltr11_write_register(self, handle, addr, value):
+        self._registers[addr.value] = value.value
+        return True
+
+    def ltr11_get_detection(self, handle, gpio1, gpio2):
+        t = self._produced() / self.sampling_frequency if self._acquiring else 0
+        targets = self._active_targets(t)
+        deref(gpio1).value = bool(targets)
+        if targets:
+            strongest = max(targets, key=lambda target: target.amplitude)
+            deref(gpio2).value = strongest.frequency < 0
+        return True
+
+    def ltr11_start_data_acquisition(self, handle):
+        self._acquiring = True
+        self._start_time = self.clock()
+        self._consumed = 0
+        return True
+
+    def ltr11_stop_data_acquisition(self, handle):
+        self._acquiring = False
+        return True
+
+    def ltr11_get_raw_data(self, handle, data, nsamples, overflow,
+                           min_samples, max_samples):
+        if not self._acquiring:
+            return False
+
+        produced = self._produced()
+        if produced - self._consumed > self.fifo_size:
+            # the oldest samples were pushed out of the FIFO
+            self._consumed = produced - self.fifo_size
+            self._overflow = True
+
+        available = produced - self._consumed
+        if available < max(min_samples, 1):
+            deref(nsamples).value = 0
+            return True
+
+        n = min(available, max_samples)
+        self._synthesize(self._consumed, n)
+        self._consumed += n
+
+        deref(data).contents = ctypes.c_double.from_buffer(self._buffer)
+        deref(nsamples).value = n
+        deref(overflow).value = self._overflow
+        self._overflow = False
+        return True
+
+    def ltr11_soft_reset(self, handle):
+        self._config = {"mode": 0,
+                        "pulse_width": 0,
+                        "pulse_repetition": 1,
+                        "hold_time": 4,
+                        "detection_threshold": 0,
+                        "tx_power_level": 7,
+                        "rx_if_gain": 8,
+                        "adc": 0,
+                        "sampling_frequency": 2000,
+                        "rf_center_freq": 1}
+        self._registers = {}
+        self._acquiring = False
+        self._consumed = 0
+        self._overflow = False
+        return True
+
+    def ltr11_get_configuration(self, handle, config):
+        config = deref(config)
+        for name, value in self._config.items():
+            setattr(config, name, value)
+        return True
+
+    def ltr11_set_configuration(self, handle, config):
+        config = deref(config)
+        if config.mode == 0 and not 0 < config.sampling_frequency <= 3000:
+            return False
+        for name in self._config:
+            self._config[name] = getattr(config, name)
+        return True
+
+    def ltr11_get_firmware_version(self, handle, major, minor, build):
+        for arg, value in zip((major, minor, build), self.firmware_version):
+            deref(arg).value = value
+        return True
+
+    def ltr11_get_device_info(self, handle, device_info):
+        info = deref(device_info)
+        info.min_rf_frequency_kHz = 61075000
+        info.max_rf_frequency_kHz = 61425000
+        info.num_tx_antennas = 1
+        info.num_rx_antennas = 1
+        info.max_tx_power = 7
+        info.num_temp_sensors = 0
+        info.major_version_hw = 2
+        info.minor_version_hw = 0
+        info.interleaved_rx = 1
+        return True
@@ -0,0 +1,298 @@
+"""
+Continuous data acquisition for BGT60LTR11AIP
+
+Overview
+--------
+
+``BGT60LTR11`` only fetches samples when asked to. If the calling code is busy
+for longer than the FIFO on the RadarBaseboardMCU7 can buffer, samples are
+lost and ``get_data`` raises ``BGT60LTR11FIFOError``.
+
+``BGT60LTR11Stream`` runs a background thread that drains the FIFO
+continuously into an ``IQRingBuffer`` of fixed size. Consumers never talk to
+the device; they read either the latest N samples or all samples since a
+cursor from the ring buffer, without blocking the reader thread:
+
+    with BGT60LTR11() as ltr11:
+        ltr11.set_configuration(sampling_frequency=2000)
+        with BGT60LTR11Stream(ltr11) as stream:
+            cursor = stream.buffer.cursor
+            while True:
+                ifi, ifq, cursor, lost = stream.read_since(cursor)
+                # process ifi, ifq
+
+The library is not thread-safe. While the stream is running the reader
+thread owns the device; do not call any other method of the device until
+the stream is stopped.
+"""
+
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+from ltr11 import BGT60LTR11Error, BGT60LTR11TimeoutError
+
+__all__ = ["IQRingBuffer", "BGT60LTR11StreamStats", "BGT60LTR11Stream"]
+
+
+BGT60LTR11StreamStats = namedtuple(
+    "BGT60LTR11StreamStats",
+    ["samples", "reads", "overflows", "dropped_samples"])
+BGT60LTR11StreamStats.__doc__ = '''\
+Statistics of a ``BGT60LTR11Stream``
+
+Members:
+- ``samples``: number of samples written to the ring buffer
+- ``reads``: number of successful reads from the device
+- ``overflows``: number of reads reporting a FIFO overflow
+- ``dropped_samples``: estimated number of samples lost in FIFO overflows'''
+
+
+class IQRingBuffer:
+    """Ring buffer of IFI/IFQ samples with one writer and many readers.
+
+    Samples are addressed by a cursor which counts all samples ever written.
+    The writer never waits for readers: if a reader falls more than
+    ``capacity`` samples behind, the oldest samples are overwritten and
+    reported as lost on the next read.
+
+    No lock is used. The writer announces the range it is about to overwrite
+    before touching the storage and publishes the new cursor afterwards;
+    readers copy first and then discard whatever the writer may have
+    overwritten in the meantime.
+    """
+
+    def __init__(self, capacity):
+        """Create a ring buffer holding `capacity` samples."""
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros((2, capacity))  # row 0: IFI, row 1: IFQ
+        self._cursor = 0    # samples published to readers
+        self._reserved = 0  # samples the writer may be writing right now
+
+    @property
+    def cursor(self):
+        """Cursor after the most recent sample."""
+        return self._cursor
+
+    def write(self, raw_data):
+        """Append interleaved I/Q data as returned by ``get_raw_data``.
+
+        Must only be called from a single thread.
+        """
+        n = len(raw_data) // 2
+        start = self._cursor
+        if n > self.capacity:
+            # only the most recent samples fit
+            raw_data = raw_data[2*(n - self.capacity):]
+            start += n - self.capacity
+            n = self.capacity
+
+        self._reserved = start + n
+        pos = start % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[0, pos:pos+first] = raw_data[1:2*first:2]
+        self._data[1, pos:pos+first] = raw_data[0:2*first:2]
+        if first < n:
+            self._data[0, :n-first] = raw_data[2*first+1::2]
+            self._data[1, :n-first] = raw_data[2*first::2]
+        self._cursor = start + n
+
+    def _copy(self, start, stop, out):
+        pos = start % self.capacity
+        n = stop - start
+        first = min(n, self.capacity - pos)
+        out[:, :first] = self._data[:, pos:pos+first]
+        out[:, first:n] = self._data[:, :n-first]
+
+    def read_since(self, cursor, max_samples=None, out=None):
+        """Read all samples written since `cursor`.
+
+        Parameters
+        ----------
+        cursor: int
+            Cursor returned by a previous read or ``cursor``.
+
+        max_samples: int
+            If given, at most the `max_samples` oldest samples after `cursor`
+            are returned; the remaining ones are left for the next read.
+
+        out: np.ndarray
+            Optional array of shape (2, n) receiving IFI and IFQ. It must
+            hold at least as many samples as are returned.
+
+        Returns
+        -------
+        ifi: np.ndarray
+            IFI samples.
+
+        ifq: np.ndarray
+            IFQ samples.
+
+        cursor: int
+            Cursor to pass to the next call.
+
+        lost: int
+            Number of samples after `cursor` that were overwritten before
+            they could be read.
+        """
+        stop = self._cursor
+        start = max(cursor, stop - self.capacity)
+        if max_samples is not None:
+            stop = min(stop, start + max_samples)
+        if out is None:
+            out = np.empty((2, stop - start))
+        self._copy(start, stop, out)
+
+        # drop samples the writer overwrote while we were copying
+        valid = min(self._reserved - self.capacity, stop)
+        if valid > start:
+            out[:, :stop - valid] = out[:, valid - start:stop - start]
+            start = valid
+        n = stop - start
+        return out[0, :n], out[1, :n], stop, start - cursor
+
+    def read_latest(self, num_samples, out=None):
+        """Read the `num_samples` most recent samples.
+
+        Fewer samples are returned if fewer have been written so far.
+
+        Returns
+        -------
+        ifi: np.ndarray
+            IFI samples.
+
+        ifq: np.ndarray
+            IFQ samples.
+        """
+        if num_samples > self.capacity:
+            raise ValueError(
+                f"cannot read {num_samples} samples from a ring buffer of "
+                f"capacity {self.capacity}")
+        while True:
+            stop = self._cursor
+            start = max(stop - num_samples, 0)
+            ifi, ifq, _, lost = self.read_since(start, stop - start, out)
+            if not lost:
+                return ifi, ifq
+
+
+class BGT60LTR11Stream:
+    """Background reader draining a BGT60LTR11AIP into an ``IQRingBuffer``."""
+
+    def __init__(self, device, capacity=16384, block_samples=128):
+        """Create a stream for an opened and configured device.
+
+        Parameters
+        ----------
+        device: ``BGT60LTR11``
+            Opened device. Configure it before starting the stream.
+
+        capacity: int
+            Number of samples kept in the ring buffer.
+
+        block_samples: int
+            The FIFO is drained whenever about `block_samples` new samples
+            are expected. Smaller values lower the latency, larger values
+            the number of wakeups.
+        """
+        self.device = device
+        self.buffer = IQRingBuffer(capacity)
+        self.block_samples = block_samples
+        self._thread = None
+        self._stopped = threading.Event()
+        self._error = None
+        self._samples = 0
+        self._reads = 0
+        self._overflows = 0
+        self._dropped_samples = 0
+
+    def start(self):
+        """Start data acquisition and the reader thread."""
+        if self._thread is not None:
+            raise BGT60LTR11Error("Stream already started")
+        self._sampling_frequency = self.device.get_sampling_frequency()
+        self._error = None
+        self.device.start_data_acquisition()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="BGT60LTR11Stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the reader thread and data acquisition."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.device.stop_data_acquisition()
+
+    def _run(self):
+        interval = self.block_samples / self._sampling_frequency
+        last = time.monotonic()
+        try:
+            while True:
+                # let about one block accumulate in the FIFO; returns early
+                # when the stream is stopped
+                if self._stopped.wait(max(last + interval - time.monotonic(), 0)):
+                    break
+                try:
+                    overflow, data = self.device.get_raw_data(
+                        timeout=interval)
+                except BGT60LTR11TimeoutError:
+                    continue
+                now = time.monotonic()
+                n = len(data) // 2
+                self.buffer.write(data)
+
+                self._reads += 1
+                self._samples += n
+                if overflow:
+                    # everything produced since the last read that did not
+                    # make it into this one was discarded by the FIFO
+                    expected = round((now - last) * self._sampling_frequency)
+                    self._overflows += 1
+                    self._dropped_samples += max(expected - n, 0)
+                last = now
+        except BGT60LTR11Error as e:
+            self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise BGT60LTR11Error(
+                f"Stream stopped: {self._error}") from self._error
+
+    @property
+    def stats(self):
+        """Current ``BGT60LTR11StreamStats``."""
+        return BGT60LTR11StreamStats(
+            self._samples, self._reads, self._overflows,
+            self._dropped_samples)
+
+    def read_latest(self, num_samples, out=None):
+        """Return (ifi, ifq) with the `num_samples` most recent samples.
+
+        See ``IQRingBuffer.read_latest``. Raises ``BGT60LTR11Error`` if the
+        reader thread stopped because of an error.
+        """
+        self._check()
+        return self.buffer.read_latest(num_samples, out)
+
+    def read_since(self, cursor, max_samples=None, out=None):
+        """Return (ifi, ifq, cursor, lost) with all samples since `cursor`.
+
+        See ``IQRingBuffer.read_since``. Raises ``BGT60LTR11Error`` if the
+        reader thread stopped because of an error.
+        """
+        self._check()
+        return self.buffer.read_since(cursor, max_samples, out)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,217 @@
+"""
+Threaded pipeline of processing stages connected by bounded queues
+
+Overview
+--------
+
+Each stage runs a function in its own thread, taking items from the queue
+in front of it and putting the results into the queue of the next stage. A
+slow stage therefore only delays its own items: while the sorter runs the
+model on item N, item N+1 is already captured and preprocessed. TFLite,
+OpenCV and the I2C/GPIO calls release the GIL, so the stages really overlap
+on the Raspberry Pi's cores.
+
+Queues are bounded: when a stage falls behind, the stages in front of it
+block instead of piling up frames in memory.
+
+    pipeline = Pipeline([("capture", capture), ("preprocess", prepare),
+                         ("inference", infer), ("actuation", actuate)])
+    pipeline.start()
+    pipeline.put(item)
+    ...
+    pipeline.join()     # wait until all items went through
+    pipeline.stop()
+    print(pipeline.stats)
+
+A stage function returning None drops the item. An item whose stage raises
+is not dropped: a ``StageFailure`` takes its place, skips the remaining
+stages and is handed to the last one, so that the last stage still sees
+every item in order and decides what a failed one means:
+
+    def actuate(item):
+        if isinstance(item, StageFailure):
+            print(f"{item.stage} failed: {item.error!r}")
+            return
+        ...
+
+The metrics of every stage are available in ``stats``.
+"""
+
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+__all__ = ["StageStats", "StageFailure", "Pipeline"]
+
+
+StageStats = namedtuple(
+    "StageStats",
+    ["items", "failures", "busy", "idle", "blocked", "throughput"])
+StageStats.__doc__ = '''\
+Statistics of a pipeline stage
+
+Members:
+- ``items``: number of items processed
+- ``failures``: number of items the stage function raised on
+- ``busy``: time in s spent in the stage function
+- ``idle``: time in s spent waiting for input
+- ``blocked``: time in s spent waiting for room in the next queue
+- ``throughput``: items per second of busy time, the rate the stage could
+  sustain on its own'''
+
+StageFailure = namedtuple("StageFailure", ["stage", "error", "item"])
+StageFailure.__doc__ = '''\
+Stands in for an item whose stage raised an exception
+
+Members:
+- ``stage``: name of the stage that raised
+- ``error``: the exception
+- ``item``: the input of that stage'''
+
+# marks the end of the input; passed on from stage to stage
+_STOP = object()
+
+
+class _Stage:
+    def __init__(self, name, func, inbox, outbox, pipeline):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.pipeline = pipeline
+        self.items = 0
+        self.failures = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.thread = threading.Thread(
+            target=self._run, name=f"Pipeline-{name}", daemon=True)
+
+    def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            item = self.inbox.get()
+            t1 = time.perf_counter()
+            self.idle += t1 - t0
+            if item is _STOP:
+                if self.outbox is not None:
+                    self.outbox.put(_STOP)
+                return
+            if isinstance(item, StageFailure) and self.outbox is not None:
+                # failed in an earlier stage: pass it on to the last stage
+                result = item
+            else:
+                try:
+                    result = self.func(item)
+                except Exception as e:
+                    self.failures += 1
+                    result = self.pipeline._fail(self.name, e, item)
+                self.items += 1
+            t2 = time.perf_counter()
+            self.busy += t2 - t1
+            if result is None or self.outbox is None:
+                self.pipeline._done()
+                continue
+            self.outbox.put(result)
+            self.blocked += time.perf_counter() - t2
+
+    @property
+    def stats(self):
+        return StageStats(self.items, self.failures, self.busy, self.idle,
+                          self.blocked,
+                          self.items / self.busy if self.busy else 0.0)
+
+
+class Pipeline:
+    """Stages running in threads, connected by bounded queues"""
+
+    def __init__(self, stages, maxsize=2, max_errors=100):
+        """
+        Parameters
+        ----------
+        stages: list
+            (name, function) pairs in processing order. Each function gets
+            the result of the previous one; the last one's result is
+            discarded. The last function also gets a ``StageFailure`` for
+            every item that raised in an earlier stage.
+
+        maxsize: int
+            Capacity of the queue in front of every stage.
+
+        max_errors: int
+            Number of the most recent ``StageFailure`` kept in ``errors``;
+            ``stats`` counts all of them.
+        """
+        self.maxsize = maxsize
+        # StageFailure of the most recent items that raised, in order
+        self.errors = deque(maxlen=max_errors)
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        queues = [queue.Queue(maxsize) for _ in stages]
+        self._stages = [
+            _Stage(name, func, queues[i],
+                   queues[i + 1] if i + 1 < len(stages) else None, self)
+            for i, (name, func) in enumerate(stages)]
+        self._started = False
+
+    def start(self):
+        """Start the stage threads."""
+        if not self._started:
+            for stage in self._stages:
+                stage.thread.start()
+            self._started = True
+        return self
+
+    def put(self, item, block=True, timeout=None):
+        """Feed an item to the first stage.
+
+        Raises ``queue.Full`` if `block` is False or `timeout` expires and
+        the first queue is full.
+        """
+        with self._idle:
+            self._in_flight += 1
+        try:
+            self._stages[0].inbox.put(item, block, timeout)
+        except queue.Full:
+            self._done()
+            raise
+
+    def join(self, timeout=None):
+        """Wait until every item fed so far has left the pipeline.
+
+        Returns False if `timeout` expired first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def stop(self):
+        """Let the stages finish the queued items, then end their threads."""
+        if not self._started:
+            return
+        self._stages[0].inbox.put(_STOP)
+        for stage in self._stages:
+            stage.thread.join()
+        self._started = False
+
+    def _done(self):
+        with self._idle:
+            self._in_flight -= 1
+            self._idle.notify_all()
+
+    def _fail(self, name, error, item):
+        # keep the pipeline running; the failure replaces the item
+        failure = StageFailure(name, error, item)
+        self.errors.append(failure)
+        return failure
+
+    @property
+    def stats(self):
+        """``StageStats`` per stage name, in processing order."""
+        return {stage.name: stage.stats for stage in self._stages}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,103 @@
+"""
+Frame preprocessing for the waste classifier without TensorFlow.
+
+Reproduces what the scripts used to do with
+``tensorflow.keras.preprocessing.image``:
+
+    img = cv2.resize(img, (224, 224))
+    img_tensor = image.img_to_array(img) / 255.
+
+bit for bit, with numpy and OpenCV only. As with ``img_to_array``, the
+channel order is left untouched: frames from OpenCV stay BGR, which is what
+the model was used with on the Raspberry Pi.
+"""
+
+import numpy as np
+import cv2
+
+__all__ = ["img_to_array", "resize", "to_input", "quantize"]
+
+
+def img_to_array(img, dtype="float32"):
+    """Same as ``keras.preprocessing.image.img_to_array`` (channels last).
+
+    Converts a frame to an array of `dtype` and shape (height, width,
+    channels); grayscale frames get a channel axis of length 1.
+    """
+    x = np.asarray(img, dtype=dtype)
+    if x.ndim == 2:
+        x = x.reshape(x.shape + (1,))
+    elif x.ndim != 3:
+        raise ValueError(f"Unsupported image shape: {x.shape}")
+    return x
+
+
+def resize(img, size, interpolation=cv2.INTER_LINEAR):
+    """Resize a frame to `size` = (width, height) like ``cv2.resize``.
+
+    Frames which already have the requested size are returned unchanged.
+    """
+    if img.shape[1::-1] == tuple(size):
+        return img
+    return cv2.resize(img, tuple(size), interpolation=interpolation)
+
+
+def to_input(img, size=None, out=None, dtype=np.float32, quantization=None):
+    """Resize a frame and scale it to [0, 1] as the model expects.
+
+    Equivalent to ``img_to_array(resize(img, size)) / 255.``.
+
+    Parameters
+    ----------
+    img: np.ndarray
+        Frame of shape (height, width, channels) or (height, width).
+
+    size: tuple
+        Target size (width, height); the frame is not resized if None.
+
+    out: np.ndarray
+        Optional array of shape (height, width, channels) receiving the
+        result, e.g. a view of the interpreter's input tensor.
+
+    dtype: np.dtype
+        Data type of the result if `out` is not given.
+
+    quantization: tuple
+        (scale, zero_point) of a quantized input tensor; the scaled frame is
+        then quantized to `dtype` (or the dtype of `out`), see `quantize`.
+    """
+    if size is not None:
+        img = resize(img, size)
+    if img.ndim == 2:
+        img = img.reshape(img.shape + (1,))
+    if out is None:
+        out = np.empty(img.shape, dtype=dtype)
+    if quantization is not None:
+        return quantize(img, *quantization, out=out)
+    # cast first, then divide in the target precision, as
+    # img_to_array(img) / 255. does
+    np.divide(img, out.dtype.type(255), out=out, dtype=out.dtype)
+    return out
+
+
+def quantize(img, scale, zero_point, out):
+    """Quantize a uint8 frame scaled to [0, 1] into an integer tensor.
+
+    Computes ``round(img / 255. / scale + zero_point)`` clipped to the range
+    of ``out.dtype``. For the usual input quantization of a [0, 1] input,
+    scale = 1/255 with zero_point 0 (uint8) or -128 (int8), this reduces to
+    ``img + zero_point`` and the frame is copied without any float math.
+    """
+    info = np.iinfo(out.dtype)
+    if (np.isclose(scale * 255, 1, rtol=1e-6, atol=0)
+            and info.min <= zero_point and 255 + zero_point <= info.max):
+        if zero_point == 0 and out.dtype == img.dtype:
+            np.copyto(out, img)
+        else:
+            np.add(img, zero_point, out=out, dtype=np.int16, casting="unsafe")
+        return out
+    q = np.rint(np.asarray(img, dtype=np.float32) * np.float32(1 / (255 * scale))
+                + np.float32(zero_point))
+    np.clip(q, info.min, info.max, out=q)
+    out[...] = q
+    return out
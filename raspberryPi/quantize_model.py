@@ -0,0 +1,115 @@
+# This script does the following:
+#   1. Loads the float waste classification model (Keras .h5 or SavedModel)
+#   2. Converts it to a fully int8 quantized TFLite model, calibrated on
+#      images of a labelled dataset (representative dataset)
+#   3. Evaluates the float and the int8 TFLite models with WasteClassifier on
+#      the same dataset and reports accuracy per class, the accuracy delta and
+#      the mean inference time of both on this CPU
+#
+# A .tflite model cannot be quantized after the fact, so the conversion
+# needs the Keras/SavedModel the float model was exported from. The dataset
+# directory holds one subdirectory of images per class:
+#     dataset/can/*.jpg, dataset/paperbox/*.jpg, dataset/PET/*.jpg
+# Images are read with OpenCV (BGR), as on the Raspberry Pi.
+#
+# Usage:
+#     $ python quantize_model.py SOURCE DATASET [--float FLOAT_TFLITE]
+#                                [--output INT8_TFLITE] [--calibration N]
+#
+# Dependencies:
+#   - tensorflow: The conversion needs the full TensorFlow package
+#         $ pip install tensorflow
+
+import argparse
+import os
+import time
+import numpy as np
+import cv2
+import tensorflow as tf
+import preprocess
+from classifier import CLASSES, MODEL_PATH, WasteClassifier
+
+
+def load_dataset(path, classes):
+    """Return a list of (image path, class index) of a dataset directory."""
+    samples = []
+    for label, name in enumerate(classes):
+        directory = os.path.join(path, name)
+        for filename in sorted(os.listdir(directory)):
+            samples.append((os.path.join(directory, filename), label))
+    return samples
+
+
+def convert(source, samples, input_size, num_calibration):
+    """Convert a Keras/SavedModel model to an int8 TFLite flatbuffer."""
+    if os.path.isdir(source):
+        converter = tf.lite.TFLiteConverter.from_saved_model(source)
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model(
+            tf.keras.models.load_model(source))
+
+    rng = np.random.default_rng(0)
+    calibration = rng.permutation(len(samples))[:num_calibration]
+
+    def representative_dataset():
+        for i in calibration:
+            img = cv2.imread(samples[i][0])
+            yield [preprocess.to_input(img, input_size)[np.newaxis]]
+
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    return converter.convert()
+
+
+def evaluate(model_path, samples, classes):
+    """Return (confusion matrix, inference times) of a TFLite model."""
+    classifier = WasteClassifier(model_path, classes)
+    confusion = np.zeros((len(classes), len(classes)), dtype=int)
+    times = []
+    for path, label in samples:
+        classifier.preprocess(cv2.imread(path))
+        t0 = time.perf_counter()
+        classifier.invoke()
+        times.append(time.perf_counter() - t0)
+        output, _ = classifier.postprocess()
+        confusion[label, classes.index(output)] += 1
+    return confusion, np.array(times)
+
+
+def report(name, confusion, times, classes):
+    accuracy = np.trace(confusion) / confusion.sum()
+    per_class = np.diag(confusion) / np.maximum(confusion.sum(axis=1), 1)
+    print(f"{name}: accuracy {100*accuracy:.1f}%, "
+          f"invoke {1e3*times.mean():.1f}ms (p95 {1e3*np.percentile(times, 95):.1f}ms)")
+    for c, acc in zip(classes, per_class):
+        print(f"    {c:>10} {100*acc:5.1f}%")
+    return accuracy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="Keras .h5 file or SavedModel directory")
+    parser.add_argument("dataset", help="directory with one subdirectory per class")
+    parser.add_argument("--float", default=MODEL_PATH, dest="float_model")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--calibration", type=int, default=200,
+                        help="number of images used for calibration")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.float_model)[0] + "_int8.tflite"
+    samples = load_dataset(args.dataset, CLASSES)
+
+    height, width, channels = WasteClassifier(args.float_model).input_shape
+    with open(output, "wb") as f:
+        f.write(convert(args.source, samples, (width, height), args.calibration))
+    print(f"wrote {output}")
+
+    float_confusion, float_times = evaluate(args.float_model, samples, CLASSES)
+    int8_confusion, int8_times = evaluate(output, samples, CLASSES)
+    float_accuracy = report("float", float_confusion, float_times, CLASSES)
+    int8_accuracy = report("int8", int8_confusion, int8_times, CLASSES)
+    print(f"accuracy delta {100*(int8_accuracy - float_accuracy):+.1f} points, "
+          f"speedup {np.mean(float_times) / np.mean(int8_times):.2f}x")
@@ -1,7 +1,97 @@
+"""
+Status updates to the Recycler dashboard
+
+``StatusClient`` keeps a pooled keep-alive connection to the dashboard, so
+that an update does not pay a TCP and TLS handshake through the tunnel
+every time. Requests time out instead of blocking the sensor loop, and
+failed connections and 502/503/504 answers are retried with exponential
+backoff.
+
+The base URL comes from the ``RECYCLER_STATUS_URL`` environment variable
+and defaults to the dashboard's current tunnel:
+
+    $ RECYCLER_STATUS_URL=http://localhost:3000/api/status python unltrasonic.py
+
+``update_status(name, field, status)`` sends through a shared client.
+"""
+
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+__all__ = ["DEFAULT_BASE_URL", "StatusClient", "update_status"]
+
+DEFAULT_BASE_URL = "http://fdac-125-227-128-246.ngrok.io/api/status"
+base_url = os.environ.get("RECYCLER_STATUS_URL", DEFAULT_BASE_URL)
+
+
+class StatusClient:
+    """Dashboard client reusing its connections"""
+
+    def __init__(self, base_url=None, connect_timeout=3.05, read_timeout=5.0,
+                 retries=3, backoff_factor=0.3, pool_size=4):
+        """
+        Parameters
+        ----------
+        base_url: str
+            URL of the status API, ``RECYCLER_STATUS_URL`` or
+            ``DEFAULT_BASE_URL`` if None.
+
+        connect_timeout: float
+            Time in s to wait for the connection.
+
+        read_timeout: float
+            Time in s to wait for the answer.
+
+        retries: int
+            Number of retries of a failed request.
+
+        backoff_factor: float
+            Retry n waits backoff_factor * 2 ** (n - 1) seconds.
+
+        pool_size: int
+            Number of connections kept open.
+        """
+        self.base_url = (base_url or
+                         os.environ.get("RECYCLER_STATUS_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset(["GET"]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def update_status(self, name, field, status):
+        """Set `field` of bin `name` to `status`.
+
+        Raises ``requests.RequestException`` (an OSError) if the request
+        failed after all retries or the dashboard answered with an error.
+        """
+        response = self.session.get(f"{self.base_url}/{name}/{field}/{status}",
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
-base_url = "http://fdac-125-227-128-246.ngrok.io/api/status"
+_client = None
 
 
 def update_status(name, field, status):
-    requests.get(f"{base_url}/{name}/{field}/{status}")
+    global _client
+    if _client is None:
+        _client = StatusClient(base_url)
+    return _client.update_status(name, field, status)
@@ -0,0 +1,287 @@
+"""
+Interrupt-driven distance measurement with HC-SR04 ultrasonic sensors
+
+Overview
+--------
+
+An HC-SR04 answers a 10us pulse on its trigger pin with a pulse on its echo
+pin as long as sound takes to the target and back. Instead of busy-waiting
+on ``GPIO.input`` for both edges, ``Sonar`` registers an edge callback
+(``GPIO.add_event_detect`` on both edges) per echo pin that timestamps the
+edges with ``time.perf_counter_ns``, and waits on an event until the falling
+edge arrived or the timeout expired. The CPU is idle while waiting and a
+missed echo gives a reading with ``echo`` False instead of hanging:
+
+    sonar = Sonar([18, 19, 20], [24, 25, 26])
+    reading = sonar.measure(0)
+    if reading.echo:
+        print(reading.distance)
+
+The edges are timestamped when their callback runs, which can be late when
+another thread holds the GIL. Rather than a wrong distance, a reading has no
+echo if the rising edge's callback only ran after the pulse had ended, or
+if the pulse is outside of the sensor's range (2 to 400 cm). Smaller delays
+still distort single readings; filter them, e.g. with ``fill_level``. A
+channel whose echo pin is still high from the previous ping is not
+triggered and reports no echo either.
+
+``trigger`` and ``collect`` are the two halves of ``measure``, for firing
+several sensors before collecting their echoes. Trigger a sensor again only
+after its previous echo ended (or timed out).
+
+``SonarScheduler`` fires all channels on a staggered timetable and collects
+their echoes concurrently, so that a scan of all sensors takes about one
+echo window instead of one per sensor.
+
+Pass ``gpio=fake_gpio.FakeGPIO(...)`` to run without a Raspberry Pi.
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+__all__ = ["SPEED_OF_SOUND", "ECHO_DELAY", "SonarReading", "Sonar",
+           "SonarScheduler", "echo_window"]
+
+# speed of sound in cm/s at about 20 degrees Celsius
+SPEED_OF_SOUND = 34300
+# time in s from the trigger to the rising edge of the HC-SR04's echo pulse
+ECHO_DELAY = 0.0005
+
+SonarReading = namedtuple(
+    "SonarReading", ["distance", "pulse", "timestamp", "echo"])
+SonarReading.__doc__ = '''\
+One measurement of an ultrasonic sensor
+
+Members:
+- ``distance``: distance in cm, NaN without echo
+- ``pulse``: length of the echo pulse in ns, 0 without echo
+- ``timestamp``: time.perf_counter_ns() of the trigger
+- ``echo``: False if no complete echo within the sensor's range arrived
+  before the timeout'''
+
+
+class _Channel:
+    def __init__(self, trigger_pin, echo_pin):
+        self.trigger_pin = trigger_pin
+        self.echo_pin = echo_pin
+        self.armed = False
+        self.rise = None
+        self.fall = None
+        self.triggered = 0
+        self.done = threading.Event()
+
+
+class Sonar:
+    """HC-SR04 sensors measured with edge callbacks"""
+
+    def __init__(self, trigger_pins, echo_pins, gpio=None, timeout=0.04,
+                 speed_of_sound=SPEED_OF_SOUND, min_distance=2.0,
+                 max_distance=400.0):
+        """Set up the pins and register the echo callbacks.
+
+        Parameters
+        ----------
+        trigger_pins: list
+            BCM numbers of the trigger pins, one per channel.
+
+        echo_pins: list
+            BCM numbers of the echo pins, in the same order.
+
+        gpio: module
+            GPIO module, RPi.GPIO by default.
+
+        timeout: float
+            Time in s after the trigger until an echo counts as missed. The
+            default covers the 4m range of the HC-SR04.
+
+        speed_of_sound: float
+            Speed of sound in cm/s.
+
+        min_distance, max_distance: float
+            Range of the sensor in cm; echo pulses outside of it count as
+            missed. The defaults are the HC-SR04's, whose pulse without a
+            target (about 38ms) is longer than the range.
+        """
+        if gpio is None:
+            import RPi.GPIO as gpio
+        self.gpio = gpio
+        self.timeout = timeout
+        self.speed_of_sound = speed_of_sound
+        # echo pulse lengths in ns of the range
+        self.min_pulse = 2e9 * min_distance / speed_of_sound
+        self.max_pulse = min(2e9 * max_distance / speed_of_sound, 1e9 * timeout)
+        self.channels = [_Channel(t, e) for t, e in zip(trigger_pins, echo_pins)]
+        self._by_echo = {c.echo_pin: c for c in self.channels}
+
+        self.gpio.setmode(self.gpio.BCM)
+        for c in self.channels:
+            self.gpio.setup(c.trigger_pin, self.gpio.OUT)
+            self.gpio.output(c.trigger_pin, False)
+            self.gpio.setup(c.echo_pin, self.gpio.IN)
+            self.gpio.add_event_detect(c.echo_pin, self.gpio.BOTH,
+                                       callback=self._edge)
+
+    def _edge(self, pin):
+        # called from the GPIO event thread
+        now = time.perf_counter_ns()
+        c = self._by_echo[pin]
+        if not c.armed:
+            return
+        # the echo pin is low when the sensor is triggered, so the first
+        # edge is the rising one; the level cannot tell the edges apart
+        # when the callback runs late
+        if c.rise is None:
+            if not self.gpio.input(pin):
+                # but a low level means the whole pulse is over: this
+                # callback ran too late for its timestamp to mean anything
+                c.armed = False
+                c.done.set()
+                return
+            c.rise = now
+        else:
+            c.fall = now
+            c.armed = False
+            c.done.set()
+
+    def trigger(self, channel):
+        """Send the 10us trigger pulse of a channel.
+
+        The channel is not triggered if its echo pin is still high, e.g.
+        from the previous ping; ``collect`` then reports no echo.
+        """
+        c = self.channels[channel]
+        c.armed = False
+        c.rise = c.fall = None
+        c.triggered = time.perf_counter_ns()
+        if self.gpio.input(c.echo_pin):
+            c.done.set()
+            return
+        c.done.clear()
+        c.armed = True
+        self.gpio.output(c.trigger_pin, True)
+        time.sleep(0.00001)
+        self.gpio.output(c.trigger_pin, False)
+
+    def collect(self, channel, timeout=None):
+        """Wait for the echo of the last trigger and return a ``SonarReading``.
+
+        Waits at most until `timeout` (default: the sonar's timeout) seconds
+        after the trigger.
+        """
+        c = self.channels[channel]
+        if timeout is None:
+            timeout = self.timeout
+        remaining = timeout - (time.perf_counter_ns() - c.triggered) * 1e-9
+        c.done.wait(max(remaining, 0))
+        c.armed = False
+        if c.fall is None:
+            return SonarReading(math.nan, 0, c.triggered, False)
+        pulse = c.fall - c.rise
+        if not self.min_pulse <= pulse <= self.max_pulse:
+            # an edge callback ran late, or an echo out of range
+            return SonarReading(math.nan, 0, c.triggered, False)
+        return SonarReading(pulse * 1e-9 * self.speed_of_sound / 2, pulse,
+                            c.triggered, True)
+
+    def measure(self, channel, timeout=None):
+        """Trigger a channel and return its ``SonarReading``."""
+        self.trigger(channel)
+        return self.collect(channel, timeout)
+
+    def close(self):
+        """Remove the edge callbacks and release the pins."""
+        for c in self.channels:
+            self.gpio.remove_event_detect(c.echo_pin)
+        self.gpio.cleanup([p for c in self.channels
+                           for p in (c.trigger_pin, c.echo_pin)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def echo_window(distance, speed_of_sound=SPEED_OF_SOUND, delay=ECHO_DELAY):
+    """Time in s from the trigger until the echo of a target at `distance`
+    cm has ended.
+
+    A good ``Sonar`` timeout and ``SonarScheduler`` stagger for targets
+    known to be closer, e.g. the bottom of a bin.
+    """
+    return delay + 2 * distance / speed_of_sound
+
+
+class SonarScheduler:
+    """Scans all channels of a ``Sonar`` with overlapping echo windows.
+
+    Channels that can hear each other's pings (e.g. neighbouring sensors in
+    one bin) are put into a crosstalk group; channels of a group are never
+    in flight at the same time. A scan runs in rounds: every round fires one
+    channel of each group, staggered so that the trigger pulses and the
+    first edges do not coincide, and then collects all their echoes. Without
+    groups every channel is its own group and a scan is a single round.
+
+    A channel of a round fires `stagger` seconds after the previous one, or
+    as soon as the previous one's echo has come back. With a stagger of the
+    ``echo_window`` of the deepest target, sensors that hear each other can
+    share a round: no ping is in flight while the next one is sent, and a
+    round takes about as long as the echoes themselves.
+    """
+
+    def __init__(self, sonar, groups=None, stagger=0.001):
+        """
+        Parameters
+        ----------
+        sonar: ``Sonar``
+            Sensors to scan.
+
+        groups: list
+            Lists of channel indices that must not be measured at the same
+            time. Channels not in any group are measured with every round.
+
+        stagger: float
+            Maximum delay in s between the triggers of one round. For
+            channels that can hear each other, use at least the
+            ``echo_window`` of the deepest target.
+        """
+        self.sonar = sonar
+        self.stagger = stagger
+        groups = [list(g) for g in groups or []]
+        grouped = {c for g in groups for c in g}
+        groups += [[c] for c in range(len(sonar.channels)) if c not in grouped]
+        self.groups = groups
+        # rounds[r] lists the channels fired together in round r
+        self.rounds = [[g[r] for g in groups if r < len(g)]
+                       for r in range(max(map(len, groups), default=0))]
+
+    def scan(self):
+        """Measure every channel once.
+
+        Returns
+        -------
+        list
+            ``SonarReading`` per channel, in channel order.
+        """
+        readings = [None] * len(self.sonar.channels)
+        for channels in self.rounds:
+            for k, channel in enumerate(channels):
+                if k:
+                    previous = self.sonar.channels[channels[k - 1]]
+                    delay = (previous.triggered * 1e-9 + self.stagger
+                             - time.perf_counter())
+                    previous.done.wait(max(delay, 0))
+                self.sonar.trigger(channel)
+            for channel in channels:
+                readings[channel] = self.sonar.collect(channel)
+        return readings
+
+    def distances(self):
+        """Measure every channel once and return the distances in cm.
+
+        Channels without echo are NaN.
+        """
+        return np.array([r.distance for r in self.scan()])
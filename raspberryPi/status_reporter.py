@@ -0,0 +1,189 @@
+"""
+Change-only reporting of bin status to the dashboard
+
+``StatusReporter`` sits in front of ``send_request.update_status`` and
+remembers the last value published for every (bin name, field):
+
+- a value equal to the published one is not sent again, except as a
+  heartbeat every ``heartbeat`` seconds so that the dashboard can tell a
+  dead bin from an unchanged one;
+- a new value is sent once it has been reported unchanged for ``debounce``
+  seconds, so that a reading flickering around a threshold does not send a
+  request per flicker;
+- the first value of a field is sent right away.
+
+Failed requests leave the published value unchanged, so the value is sent
+again on a later report. A failing field is retried after ``retry_delay``
+seconds, doubled with every further failure up to ``max_retry_delay``, so
+that an unreachable dashboard is not asked on every scan.
+
+With ``background=True`` the requests are sent by a worker thread, so that a
+slow or unreachable dashboard cannot hold up the caller, e.g. the sensor
+loop; a field is not sent again while its request is pending.
+
+    reporter = StatusReporter()
+    reporter.report("BIN_0", "CanFull", "true")
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+import requests
+
+from send_request import update_status
+
+__all__ = ["ReporterStats", "StatusReporter"]
+
+
+ReporterStats = namedtuple(
+    "ReporterStats", ["sent", "heartbeats", "suppressed", "failures"])
+ReporterStats.__doc__ = '''\
+Statistics of a ``StatusReporter``
+
+Members:
+- ``sent``: number of requests sent for changed or first values
+- ``heartbeats``: number of requests re-sending an unchanged value
+- ``suppressed``: number of reports not sent
+- ``failures``: number of requests that raised ``requests.RequestException``
+  or OSError, including error answers of the dashboard'''
+
+
+class _Field:
+    def __init__(self):
+        self.published = None
+        self.published_at = 0.0
+        self.candidate = None
+        self.candidate_since = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.pending = False
+
+
+class StatusReporter:
+    """Sends status values only on debounced changes and as heartbeats"""
+
+    def __init__(self, send=update_status, debounce=2.0, heartbeat=60.0,
+                 retry_delay=1.0, max_retry_delay=60.0, background=False,
+                 clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        send: callable
+            Called as ``send(name, field, status)`` to publish a value.
+
+        debounce: float
+            Time in s a new value must be reported unchanged before it is
+            sent.
+
+        heartbeat: float
+            Time in s after which an unchanged value is sent again.
+
+        retry_delay: float
+            Time in s before a field is sent again after a failed request;
+            doubled with every further failure of the field.
+
+        max_retry_delay: float
+            Upper bound in s of the retry delay.
+
+        background: bool
+            Send the requests from a worker thread instead of in ``report``.
+
+        clock: callable
+            Time source in s.
+        """
+        self.send = send
+        self.debounce = debounce
+        self.heartbeat = heartbeat
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.clock = clock
+        self.fields = {}
+        self._sent = 0
+        self._heartbeats = 0
+        self._suppressed = 0
+        self._failures = 0
+        # guards the fields and counters, which the worker updates too
+        self._lock = threading.Lock()
+        self._queue = None
+        if background:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name="StatusReporter",
+                             daemon=True).start()
+
+    def report(self, name, field, status):
+        """Report the current value of a field.
+
+        Returns True if it was sent, or queued to be sent with `background`.
+        """
+        with self._lock:
+            now = self.clock()
+            f = self.fields.setdefault((name, field), _Field())
+            request = self._decide(f, status, now)
+            if request is None:
+                self._suppressed += 1
+                return False
+            if self._queue is not None:
+                f.pending = True
+                self._queue.put((f, name, field, status, now, request))
+                return True
+        return self._send(f, name, field, status, now, request)
+
+    def _decide(self, f, status, now):
+        # "heartbeat" or "change" if the value is to be sent now, else None
+        if f.pending:
+            return None
+        if f.published is not None and status == f.published:
+            f.candidate = None
+            if now - f.published_at < self.heartbeat:
+                return None
+            request = "heartbeat"
+        else:
+            if f.published is not None:
+                if status != f.candidate:
+                    f.candidate = status
+                    f.candidate_since = now
+                if now - f.candidate_since < self.debounce:
+                    return None
+            request = "change"
+        if now < f.retry_at:
+            # backing off after a failed request
+            return None
+        return request
+
+    def _send(self, f, name, field, status, now, request):
+        try:
+            self.send(name, field, status)
+        except (requests.RequestException, OSError):
+            # timeouts, connection errors and error answers (raise_for_status)
+            # must not end the sensor loop
+            with self._lock:
+                f.pending = False
+                self._failures += 1
+                f.failures += 1
+                f.retry_at = self.clock() + min(
+                    self.retry_delay * 2 ** (f.failures - 1),
+                    self.max_retry_delay)
+            return False
+        with self._lock:
+            f.pending = False
+            f.failures = 0
+            f.retry_at = 0.0
+            f.published = status
+            f.published_at = now
+            f.candidate = None
+            if request == "heartbeat":
+                self._heartbeats += 1
+            else:
+                self._sent += 1
+        return True
+
+    def _run(self):
+        while True:
+            self._send(*self._queue.get())
+
+    @property
+    def stats(self):
+        """Current ``ReporterStats``."""
+        return ReporterStats(self._sent, self._heartbeats, self._suppressed,
+                             self._failures)
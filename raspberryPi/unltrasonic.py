@@ -1,81 +1,81 @@
 # Libraries
-import RPi.GPIO as GPIO
+import math
 import time
+import numpy as np
 
-from send_request import update_status
+from status_reporter import StatusReporter
+from sonar import Sonar, SonarScheduler, echo_window
+from fill_level import FillLevelEstimator
 
-bin_name = "BIN_0"
+# compartments with a sensor, per bin; the sensors are wired in this order
+# to GPIO_TRIGGERs and GPIO_ECHOs, so every bin needs as many pins as names
+bins = {"BIN_0": ["Can", "PET", "Box"]}
 
-# GPIO Mode (BOARD / BCM)
-GPIO.setmode(GPIO.BCM)
-
-# set GPIO Pins
+# set GPIO Pins (BCM)
 GPIO_TRIGGERs = [18, 19, 20]
 GPIO_ECHOs = [24, 25, 26]
 
-names = ["Can", "PET", "Box"]
-
-moving_avgs = [-1] * 3
-smooth_rate = 0.9
-
-# set GPIO direction (IN / OUT)
-for trig_pin in GPIO_TRIGGERs:
-    GPIO.setup(trig_pin, GPIO.OUT)
-
-for echo_pin in GPIO_ECHOs:
-    GPIO.setup(echo_pin, GPIO.IN)
-
-
-def distance(ind):
-    # set Trigger to HIGH
-    GPIO.output(GPIO_TRIGGERs[ind], True)
-
-    # set Trigger after 0.01ms to LOW
-    time.sleep(0.00001)
-    GPIO.output(GPIO_TRIGGERs[ind], False)
+channels = [(bin_name, name) for bin_name, names in bins.items() for name in names]
 
-    StartTime = time.time()
-    StopTime = time.time()
+scan_interval = 0.1  # measure all sensors 10 times per second
+print_interval = 1   # print the fill levels once per second
 
-    # save StartTime
-    while GPIO.input(GPIO_ECHOs[ind]) == 0:
-        StartTime = time.time()
+# send a status only after it changed for 2s, unchanged ones once a minute;
+# requests go out from a worker thread, as a request to an unreachable
+# dashboard can take tens of seconds with its timeouts and retries
+reporter = StatusReporter(debounce=2.0, heartbeat=60.0, background=True)
 
-    # save time of arrival
-    while GPIO.input(GPIO_ECHOs[ind]) == 1:
-        StopTime = time.time()
+# distances of the last second with outliers removed; full below 12cm, not
+# full again above 15cm; 0% at 50cm
+fill_levels = FillLevelEstimator(len(channels), window=round(1 / scan_interval),
+                                 full_distance=12, hysteresis=3,
+                                 empty_distance=50)
+distances = np.full(len(channels), np.nan)
+percents = np.full(len(channels), np.nan)
+fulls = np.zeros(len(channels), dtype=bool)
 
-    # time difference between start and arrival
-    TimeElapsed = StopTime - StartTime
-    # multiply with the sonic speed (34300 cm/s)
-    # and divide by 2, because there and back
-    distance = (TimeElapsed * 34300) / 2
+# the compartments are 50cm deep: echoes from further away are not waited
+# for, so an echo window is about 4ms instead of the 40ms of the full range
+bin_depth = 60
+window = echo_window(bin_depth)
 
-    return distance
+# set up the pins and the echo callbacks
+sonar = Sonar(GPIO_TRIGGERs, GPIO_ECHOs, timeout=window, max_distance=bin_depth)
+# the sensors of a bin hear each other's pings: they fire one echo window
+# apart, so that every ping has come back before the next one is sent, and
+# their echoes are collected together
+scheduler = SonarScheduler(sonar, stagger=window)
 
 
 def update_ultrasonic():
-    for i in range(3):
-        if moving_avgs[i] == -1:
-            moving_avgs[i] = distance(i)
-        moving_avgs[i] = moving_avgs[i] * smooth_rate + distance(i) * (1 - smooth_rate)
+    global distances, percents, fulls
+    # distances in cm, NaN if no echo arrived in time
+    distances, percents, fulls = fill_levels.update(scheduler.distances())
 
-        if moving_avgs[i] < 12:
-            print(f"{names[i]} is full")
-            update_status(bin_name, f"{names[i]}Full", "true")
-        else:
-            update_status(bin_name, f"{names[i]}Full", "false")
 
-    time.sleep(1)
+def report_status():
+    for i, (bin_name, name) in enumerate(channels):
+        if math.isnan(distances[i]):
+            # no echo yet
+            continue
+        status = "true" if fulls[i] else "false"
+        if reporter.report(bin_name, f"{name}Full", status) and fulls[i]:
+            print(f"{bin_name} {name} is full")
 
 
 if __name__ == "__main__":
     try:
+        next_scan = next_print = time.monotonic()
         while True:
-            print(moving_avgs)
             update_ultrasonic()
+            report_status()
+            if time.monotonic() >= next_print:
+                print(percents.round(), reporter.stats)
+                next_print += print_interval
+            next_scan += scan_interval
+            time.sleep(max(next_scan - time.monotonic(), 0))
 
         # Reset by pressing CTRL + C
     except KeyboardInterrupt:
         print("Measurement stopped by User")
-        GPIO.cleanup()
+        sonar.close()